@@ -0,0 +1,291 @@
+import os
+import io
+import sys
+import json
+import timeit
+import tempfile
+import platform
+import argparse
+import subprocess
+from contextlib import redirect_stdout
+from dataclasses import replace
+import numpy as np
+from loadingengine import column_loading
+
+#Offline benchmark suite of the weight and balance and tail sizing hot paths, run with:
+#python benchmarks.py                   quick sizes, results in .benchmarks/<commit>.json
+#python benchmarks.py --full            adds 1000 row cabins and 10^4 variant sweeps
+#python benchmarks.py --compare HEAD~3  also prints the ratio to the stored results of another commit
+#Every case is timed at several sizes, from the real ATR cabin (18 rows) up to synthetic cabins and sweeps.
+
+results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),".benchmarks")
+
+
+def tri_column_loading(pax_cgs,pax_weight,aft_to_fw=False):
+    """
+    Previous passenger moment generation with np.tri loading index matrices, O(n^2) memory.
+    Kept as reference for column_loading.
+    """
+    column_pax = pax_cgs.size
+    pax_load_index = np.tri(column_pax)
+    if aft_to_fw:
+        pax_load_index = np.flip(pax_load_index,axis=1)
+
+    pax_moments = np.sum(pax_weight*pax_cgs*pax_load_index,axis=1)
+    pax_moments = np.hstack([np.zeros(1),pax_moments])
+    pax_weights = np.sum(pax_weight*np.tri(column_pax),axis=1)
+    pax_weights = np.hstack([np.zeros(1),pax_weights])
+    return pax_moments, pax_weights
+
+def bench(func,number=None,repeat=5):
+    """
+    Returns best time per call in seconds.
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat,number=number))/number
+
+def bench_column_loading(sizes=(18,100,1000,4000)):
+    """
+    Compares column_loading against the np.tri version for increasing number of seats per column.
+    """
+    print(f'{"seats":>8}{"np.tri [s]":>14}{"cumsum [s]":>14}{"speedup":>10}')
+    for n in sizes:
+        pax_cgs = np.linspace(6.132,6.132+n*0.7366,n)
+        for aft_to_fw in (False,True):
+            ref = tri_column_loading(pax_cgs,80,aft_to_fw)
+            new = column_loading(pax_cgs,80,aft_to_fw)
+            assert np.allclose(ref,new)
+
+        t_tri = bench(lambda: tri_column_loading(pax_cgs,80,True))
+        t_cum = bench(lambda: column_loading(pax_cgs,80,True))
+        print(f'{n:>8}{t_tri:>14.3e}{t_cum:>14.3e}{t_tri/t_cum:>10.1f}')
+
+#cases: name -> (setup(size) returning the function to time, quick sizes, full sizes)
+#rows is the number of cabin rows (pax per column), variants the number of aircraft in a sweep
+
+def setup_cg_calculator(rows):
+    import loaddiagram as l
+    load = l.passenger_cg_data(columnpassengers=rows)+l.current_load
+    return lambda: l.cg_calculator(load)
+
+def setup_passenger_points(rows):
+    import loaddiagram as l
+    load = l.passenger_cg_data(columnpassengers=rows)
+    return lambda: l.calculate_passenger_points(load,l.current_load)
+
+def setup_passenger_points_vectorized(rows):
+    import loaddiagram as l
+    load = l.passenger_cg_data(columnpassengers=rows)
+    return lambda: l.calculate_passenger_points_vectorized(load,l.current_load)
+
+def setup_column_loading(rows):
+    pax_cgs = np.linspace(6.132,6.132+rows*0.7366,rows)
+    return lambda: column_loading(pax_cgs,80,True)
+
+def cabin_series(rows):
+    "Returns raw series (m) of loading order 01 and the LoadingDiagram of an ATR 72-600 with rows cabin rows."
+    import weightbalance as wb
+    diagram = wb.LoadingDiagram(replace(wb.ATR72_600,column_pax=rows))
+    series, _, _ = wb.assemble(*(diagram.groups[name] for name in wb.loading_orders["0"][0]),
+                               base=diagram.Structure,weight_offset=diagram.aircraft.OEW-diagram.Wmin)
+    return series, diagram
+
+def setup_assemble(rows):
+    import weightbalance as wb
+    _, diagram = cabin_series(rows)
+    groups = [diagram.groups[name] for name in wb.loading_orders["0"][0]]
+    return lambda: wb.assemble(*groups,base=diagram.Structure,weight_offset=diagram.aircraft.OEW-diagram.Wmin)
+
+def setup_extract_extreme_cgs(rows):
+    import weightbalance as wb
+    series, _ = cabin_series(rows)
+    return lambda: wb.extract_extreme_cgs(series)
+
+def setup_loading_series_extremes(rows):
+    import weightbalance as wb
+    series, _ = cabin_series(rows)
+    loading_series = wb.LoadingSeries.from_series(series)
+    return lambda: wb.extract_extreme_cgs(loading_series)
+
+def setup_conversion_m_LEMAC_percent(rows):
+    import weightbalance as wb
+    series, diagram = cabin_series(rows)
+    return lambda: wb.conversion_m_LEMAC_percent(series,diagram.aircraft.MAC,diagram.aircraft.LEMAC)
+
+def setup_convert_LEMAC_percent_out(rows):
+    import weightbalance as wb
+    series, diagram = cabin_series(rows)
+    stacked, _ = wb.stack_series(series)
+    out = np.empty_like(stacked)
+    return lambda: wb.convert_LEMAC_percent(stacked,diagram.aircraft.MAC,diagram.aircraft.LEMAC,out=out)
+
+def scissor_inputs(variants,n=1):
+    "Returns scissor inputs of aircraft n, aerodynamic coefficients perturbed into arrays of length variants."
+    import scissor as sp
+    rng = np.random.default_rng(0)
+    vary = lambda value: value*rng.uniform(0.9,1.1,variants)
+    return (vary(sp.x_ac_c[n]), vary(sp.x_ac_s[n]), sp.l_h, sp.mac, sp.VhV, sp.SM, vary(sp.Cla_h[n]), vary(sp.Cla_Ah_stat[n]),
+            vary(sp.deda[n]), sp.CL_h[n], vary(sp.Cm_ac[n]), sp.Cl_ah_cont[n])
+
+def setup_scissor_lines(variants):
+    import scissor as sp
+    x_cg = np.linspace(0,1,1000)
+    params = scissor_inputs(variants)
+    return lambda: sp.scissor_lines(x_cg,*params)
+
+def setup_min_ShS(variants):
+    import scissor as sp
+    params = scissor_inputs(variants)
+    cgmin, cgmax = np.full(variants,0.16), np.full(variants,0.67)
+    return lambda: (sp.min_ShS(cgmin,cgmax,*params), sp.cg_limits(0.19,*params))
+
+def setup_sweep(variants):
+    import sweep as sw
+    params = sw.variant_grid(fs_group_xcg=np.linspace(12.5,13.5,variants))
+    return lambda: sw.evaluate_chunk(params)
+
+def setup_import(module):
+    "Times a cold import of module in a fresh interpreter, including the import of its dependencies."
+    code = f'import time; start = time.perf_counter(); import {module}; print(time.perf_counter()-start)'
+    env = dict(os.environ,MPLBACKEND="Agg")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    return lambda: float(subprocess.run([sys.executable,"-W","ignore","-c",code],env=env,cwd=cwd,
+                                        capture_output=True,text=True,check=True).stdout)
+
+def setup_render(job):
+    import render
+    output = tempfile.TemporaryDirectory()
+    job = dict(job,output=os.path.join(output.name,job["plot"]))
+    def run():
+        with redirect_stdout(io.StringIO()):
+            render.render(job)
+    return run, output.cleanup
+
+loaddiagram_job = {"plot": "loaddiagram", "aircraft": "ATR72_HE", "order": "0", "formats": ["png"]}
+scissorplot_job = {"plot": "scissorplot", "n": 1, "formats": ["pdf"]}
+
+cases = {
+    "cg_calculator": (setup_cg_calculator,(18,100),(18,100,1000)),
+    "calculate_passenger_points": (setup_passenger_points,(18,100),(18,100,1000)),
+    "calculate_passenger_points_vectorized": (setup_passenger_points_vectorized,(18,100),(18,100,1000)),
+    "column_loading": (setup_column_loading,(18,1000),(18,1000,10000)),
+    "assemble": (setup_assemble,(18,1000),(18,1000,10000)),
+    "extract_extreme_cgs": (setup_extract_extreme_cgs,(18,1000),(18,1000,10000)),
+    "extract_extreme_cgs_LoadingSeries": (setup_loading_series_extremes,(18,1000),(18,1000,10000)),
+    "conversion_m_LEMAC_percent": (setup_conversion_m_LEMAC_percent,(18,1000),(18,1000,10000)),
+    "convert_LEMAC_percent_out": (setup_convert_LEMAC_percent_out,(18,1000),(18,1000,10000)),
+    "scissor_lines": (setup_scissor_lines,(1,100),(1,100,1000)),
+    "min_ShS": (setup_min_ShS,(1,10000),(1,10000,1000000)),
+    "sweep": (setup_sweep,(10,),(10,10000)),
+    "import": (setup_import,("sweep","loaddiagram_HE","scissorplot"),("matplotlib.pyplot","sweep","loaddiagram_HE","scissorplot")),
+    "render": (setup_render,(loaddiagram_job,scissorplot_job),(loaddiagram_job,scissorplot_job)),
+}
+
+def size_label(size):
+    if isinstance(size,dict):
+        return f'{size["plot"]}.{size["formats"][0]}'
+    return str(size)
+
+def run_case(name,size,repeat=5):
+    """
+    Returns best time in seconds of case name at size. Slow calls (>1 s) are timed once, imports report their own timer.
+    A setup returns the timed function, or the function and a teardown called afterwards.
+    """
+    setup = cases[name][0]
+    func = setup(size)
+    func, teardown = func if isinstance(func,tuple) else (func, None)
+    try:
+        if name == "import":
+            return min(func() for _ in range(repeat))
+        timer = timeit.Timer(func)
+        number, elapsed = timer.autorange()
+        if elapsed/number > 1.:
+            return elapsed/number
+        return min(timer.repeat(repeat=repeat,number=number))/number
+    finally:
+        if teardown is not None:
+            teardown()
+
+def commit_id():
+    "Returns short hash of HEAD, with a + suffix for a dirty tree, or None outside git."
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git","rev-parse","--short","HEAD"],cwd=cwd,capture_output=True,text=True,check=True).stdout.strip()
+        dirty = subprocess.run(["git","status","--porcelain","--untracked-files=no"],cwd=cwd,capture_output=True,text=True,check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit+("+" if dirty else "")
+
+def resolve_commit(ref):
+    "Returns short hash of git ref."
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    return subprocess.run(["git","rev-parse","--short",ref],cwd=cwd,capture_output=True,text=True,check=True).stdout.strip()
+
+def run_suite(full=False,only=None,repeat=5):
+    """
+    Returns dict of "case[size]" -> seconds. Parameters:
+    full: use the full sizes (1000 row cabins, 10^4 variant sweeps)
+    only: list of case names, all cases if None
+    """
+    results = {}
+    for name, (_, quick, large) in cases.items():
+        if only is not None and name not in only:
+            continue
+        for size in (large if full else quick):
+            key = f'{name}[{size_label(size)}]'
+            results[key] = run_case(name,size,repeat)
+            print(f'{key:<50}{results[key]:>12.3e} s',flush=True)
+    return results
+
+def save_results(results,commit,path=None):
+    """
+    Writes results with commit and environment to path (default .benchmarks/<commit>.json), returns path.
+    Cases already stored for the commit and not rerun are kept.
+    """
+    if path is None:
+        os.makedirs(results_dir,exist_ok=True)
+        path = os.path.join(results_dir,f'{commit or "nogit"}.json')
+    if os.path.exists(path):
+        with open(path) as file:
+            results = {**json.load(file)["results"],**results}
+    record = {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+              "machine": platform.machine(), "results": results}
+    with open(path,"w") as file:
+        json.dump(record,file,indent=1)
+    return path
+
+def load_results(commit,path=None):
+    "Returns stored results of commit, of its dirty tree (<commit>+) if the clean one was not benchmarked."
+    if path is None:
+        path = os.path.join(results_dir,f'{commit}.json')
+        if not os.path.exists(path):
+            path = os.path.join(results_dir,f'{commit}+.json')
+    with open(path) as file:
+        return json.load(file)["results"]
+
+def compare(results,reference):
+    "Prints ratio of results to reference for the cases present in both."
+    print(f'{"case":<50}{"reference [s]":>14}{"now [s]":>12}{"ratio":>8}')
+    for key, value in results.items():
+        if key in reference:
+            print(f'{key:<50}{reference[key]:>14.3e}{value:>12.3e}{value/reference[key]:>8.2f}')
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the weight and balance and tail sizing hot paths.")
+    parser.add_argument("--full",action="store_true",help="include 1000 row cabins and 10^4 variant sweeps")
+    parser.add_argument("--only",nargs="+",choices=list(cases),help="cases to run")
+    parser.add_argument("--repeat",type=int,default=5)
+    parser.add_argument("--compare",metavar="REF",help="git ref whose stored results to compare against")
+    parser.add_argument("--column-loading",action="store_true",help="only compare column_loading against the np.tri version")
+    args = parser.parse_args()
+
+    if args.column_loading:
+        bench_column_loading()
+    else:
+        commit = commit_id()
+        results = run_suite(args.full,args.only,args.repeat)
+        print(f'results written to {save_results(results,commit)}')
+        if args.compare:
+            compare(results,load_results(resolve_commit(args.compare)))
@@ -0,0 +1,119 @@
+import numpy as np
+from dataclasses import dataclass
+from weightbalance import ATR72_600, LoadingDiagram, structure
+
+#Flight phase mode of the loading diagram: cg trajectory while fuel is burnt from several tanks.
+#Every tank has an xcg table over its fuel mass, missions are rows of a structured array (e.g. sweep.variant_grid)
+#and the trajectories of all missions are computed as (missions x steps) arrays, looping over tanks only.
+#
+#missions fields:
+#   payload       kg, on board during the flight
+#   payload_xcg   m, cg of the payload
+#   fuel          kg, block fuel at take-off
+#   trip_fuel     kg, burnt during the flight
+
+
+@dataclass(slots=True)
+class Tank:
+    """
+    Fuel tank with its cg as a function of the fuel mass in it (linear interpolation in the table).
+    """
+    name: str
+    capacity: float #kg
+    mass_table: np.ndarray #kg, increasing
+    xcg_table: np.ndarray #m
+
+    def moment(self,mass):
+        "Returns fuel moment [kg m] of mass kg fuel in the tank, mass broadcasts."
+        return mass*np.interp(mass,self.mass_table,self.xcg_table)
+
+def wing_tanks(aircraft):
+    "Returns left and right wing tank of aircraft, each half of MFW at fuel_xcg (the single fuel Group of the loading diagram)."
+    half = aircraft.MFW/2
+    return [Tank(side,half,np.array([0.,half]),np.full(2,aircraft.fuel_xcg)) for side in ("left wing","right wing")]
+
+def tank_fuel(fuel,capacities,feed):
+    """
+    Returns fuel per tank, shape fuel.shape+(tanks,), when fuel kg in total is on board.
+    feed: "proportional" (all tanks at the same fraction) or "sequential" (tanks emptied in order, so filled in reverse order)
+    Raises ValueError if fuel is negative (e.g. trip fuel above the block fuel) or exceeds the total capacity.
+    """
+    capacities = np.asarray(capacities,dtype=float)
+    fuel = np.asarray(fuel,dtype=float)[...,np.newaxis]
+    if np.any(fuel < 0):
+        raise ValueError(f'negative fuel on board, down to {fuel.min()} kg')
+    if np.any(fuel > capacities.sum()):
+        raise ValueError(f'fuel up to {fuel.max()} kg exceeds the tank capacity of {capacities.sum()} kg')
+    if feed == "proportional":
+        return fuel*capacities/capacities.sum()
+    if feed == "sequential":
+        #tank k holds what is left after filling the tanks fed after it
+        after = np.cumsum(capacities[::-1])[::-1]-capacities
+        return np.clip(fuel-after,0,capacities)
+    raise ValueError(f'unknown feed {feed!r}')
+
+@dataclass(slots=True)
+class FlightResult:
+    """
+    cg: cg [%LEMAC] per mission (rows) and time step (columns)
+    weight: aircraft weight [kg] per mission and time step
+    cg_min, cg_max: in-flight cg excursion per mission [%LEMAC]
+    ground: minimum and maximum cg of the ground loading diagram [%LEMAC]
+    """
+    cg: np.ndarray
+    weight: np.ndarray
+    cg_min: np.ndarray
+    cg_max: np.ndarray
+    ground: tuple
+
+    def excursion(self):
+        "Returns in-flight minimum and maximum cg over all missions next to the ground envelope."
+        return {"flight": (self.cg_min.min(),self.cg_max.max()),"ground": self.ground}
+
+def trajectory(missions,aircraft=ATR72_600,tanks=None,profile=np.linspace(0,1,61),feed="proportional",orders=("0","5")):
+    """
+    Returns FlightResult of the cg trajectories of all missions.
+    Parameters:
+    missions: structured array with payload, payload_xcg, fuel and trip_fuel per mission
+    tanks: list of Tank, wing_tanks(aircraft) if None
+    profile: fraction of the trip fuel burnt at every time step, from 0 (take-off) to 1 (landing)
+    feed: tank feed order, see tank_fuel
+    orders: loading orders of the ground envelope
+    """
+    if tanks is None:
+        tanks = wing_tanks(aircraft)
+    diagram = LoadingDiagram(aircraft)
+    base = structure(aircraft)
+
+    #zero fuel state per mission
+    zf_weight = base[1,0]+missions["payload"]
+    zf_moment = base[0,0]+missions["payload"]*missions["payload_xcg"]
+
+    #fuel on board per mission and step, split over the tanks
+    fuel = missions["fuel"][:,np.newaxis]-missions["trip_fuel"][:,np.newaxis]*np.asarray(profile)
+    per_tank = tank_fuel(fuel,[tank.capacity for tank in tanks],feed)
+
+    weight = zf_weight[:,np.newaxis]+fuel
+    moment = zf_moment[:,np.newaxis]+sum(tank.moment(per_tank[...,k]) for k, tank in enumerate(tanks))
+    cg = diagram.to_LEMAC(moment/weight,isArray=False)
+    return FlightResult(cg,weight+aircraft.OEW-diagram.Wmin,cg.min(axis=1),cg.max(axis=1),diagram.extreme_cgs(orders))
+
+if __name__=="__main__":
+    from sweep import variant_grid
+
+    aircraft = ATR72_600
+    missions = variant_grid(payload=np.linspace(0,aircraft.MPW,20),payload_xcg=np.linspace(10.5,12.5,10),
+                            fuel=np.linspace(1500,aircraft.MFW,10),trip_fuel=np.linspace(0.3,0.8,5))
+    missions["trip_fuel"] *= missions["fuel"] #trip fuel as fraction of the block fuel
+
+    #illustrative asymmetric layout: a centre tank 1.5 m forward of fuel_xcg, fed first, and two wing tanks,
+    #together at fuel_xcg when full
+    centre = 0.2*aircraft.MFW
+    wing = (aircraft.MFW-centre)/2
+    wing_xcg = aircraft.fuel_xcg+1.5*centre/(2*wing)
+    tanks = [Tank("centre",centre,np.array([0.,centre]),np.full(2,aircraft.fuel_xcg-1.5)),
+             *(Tank(side,wing,np.array([0.,wing]),np.full(2,wing_xcg)) for side in ("left wing","right wing"))]
+    for feed in ("proportional","sequential"):
+        result = trajectory(missions,aircraft,tanks,feed=feed)
+        excursion = result.excursion()
+        print(f'{missions.size} missions, {feed} feed: in-flight cg: {excursion["flight"]}\tground cg: {excursion["ground"]}')
@@ -1,5 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from loadingengine import sweep_points
 
 ########################################################
 # Inputs, to be changed based on aircraft/Excel calculations
@@ -77,9 +78,28 @@ def calculate_passenger_points(passenger_load_lst, current_load):
 
     return front_points, back_points
 
+def calculate_passenger_points_vectorized(passenger_load_lst, current_load):
+    """
+    Same loading points as calculate_passenger_points (kept as reference implementation),
+    computed with cumulative sums in O(n) instead of re-summing every partial load.
+    """
+
+    weights = np.array([passenger["weight"] for passenger in passenger_load_lst], dtype=float)
+    cgs = np.array([passenger["cg"] for passenger in passenger_load_lst], dtype=float)
+
+    base_weight = sum(component["weight"] for component in current_load)
+    base_moment = sum(component["weight"] * component["cg"] for component in current_load)
+
+    (front_cg, front_weight), (back_cg, back_weight) = sweep_points(weights, cgs, base_weight, base_moment)
+
+    front_points = list(zip(front_cg.tolist(), front_weight.tolist()))
+    back_points = list(zip(back_cg.tolist(), back_weight.tolist()))
+
+    return front_points, back_points
+
 # Calculate loading points for window and aisle (difference for aisle is that window is already seated)
-window_front_points, window_back_points = calculate_passenger_points(passenger_load_lst, current_load)
-aisle_front_points, aisle_back_points = calculate_passenger_points(passenger_load_lst, current_load + passenger_load_lst)
+window_front_points, window_back_points = calculate_passenger_points_vectorized(passenger_load_lst, current_load)
+aisle_front_points, aisle_back_points = calculate_passenger_points_vectorized(passenger_load_lst, current_load + passenger_load_lst)
 
 
 # Find minimum and maximum CG in all points lists
@@ -89,20 +109,26 @@ max_cg = max(point[0] for point in all_points)
 min_weight = min(point[1] for point in all_points)
 max_weight = max(point[1] for point in all_points)
 
-print(f"Minimum CG: {min_cg}")
-print(f"Maximum CG: {max_cg}")
-
-
-# Plotting
-plt.scatter(*zip(*fuel_loading_points), color='r', label="Fuel Loading")
-plt.scatter(*zip(*window_front_points), color='b', label="Window Seating (Front to Back)")
-plt.scatter(*zip(*window_back_points), color='g', label="Window Seating (Back to Front)")
-plt.scatter(*zip(*aisle_front_points), color='y', label="Aisle Seating (Front to Back)")
-plt.scatter(*zip(*aisle_back_points), color='m', label="Aisle Seating (Back to Front)")
-plt.vlines([min_cg*0.98, max_cg*1.02], min_weight, max_weight, linestyles='dashed', colors='k', alpha=0.5, label="CG Limits")
-plt.xlabel("CG Position")
-plt.ylabel("Weight")
-plt.grid()
-plt.legend(loc = "upper left")
-plt.title("Fuel Loading Diagram")
-plt.show()
+def draw_loading_points(ax):
+    """
+    Draws the loading points on Axes ax, without touching the pyplot state.
+    """
+    ax.scatter(*zip(*fuel_loading_points), color='r', label="Fuel Loading")
+    ax.scatter(*zip(*window_front_points), color='b', label="Window Seating (Front to Back)")
+    ax.scatter(*zip(*window_back_points), color='g', label="Window Seating (Back to Front)")
+    ax.scatter(*zip(*aisle_front_points), color='y', label="Aisle Seating (Front to Back)")
+    ax.scatter(*zip(*aisle_back_points), color='m', label="Aisle Seating (Back to Front)")
+    ax.vlines([min_cg*0.98, max_cg*1.02], min_weight, max_weight, linestyles='dashed', colors='k', alpha=0.5, label="CG Limits")
+    ax.set_xlabel("CG Position")
+    ax.set_ylabel("Weight")
+    ax.grid()
+    ax.legend(loc = "upper left")
+    ax.set_title("Fuel Loading Diagram")
+
+if __name__=="__main__":
+    print(f"Minimum CG: {min_cg}")
+    print(f"Maximum CG: {max_cg}")
+
+    # Plotting
+    draw_loading_points(plt.figure().add_subplot())
+    plt.show()
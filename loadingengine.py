@@ -0,0 +1,154 @@
+from itertools import permutations
+import numpy as np
+
+#Array based loading engine, all loads given as weight and cg arrays.
+#Running totals are built with prefix/suffix cumulative sums, so a sweep over n loads is O(n).
+
+
+def cumulative_loading(weights,cgs,base_weight=0.,base_moment=0.):
+    """
+    Returns cg and weight after each load is added, in the order given.
+    Parameters:
+    weights: np.ndarray of load weights
+    cgs: np.ndarray of load cgs, same length as weights
+    base_weight, base_moment: weight and moment already on board
+    Returns:
+    cg, weight: np.ndarrays with one entry per load
+    """
+    weights = np.asarray(weights,dtype=float)
+    moments = weights*np.asarray(cgs,dtype=float)
+
+    total_weight = np.cumsum(weights) + base_weight
+    total_moment = np.cumsum(moments) + base_moment
+    return total_moment/total_weight, total_weight
+
+def sweep_points(weights,cgs,base_weight=0.,base_moment=0.):
+    """
+    Returns front to back and back to front loading points.
+    Front to back point i has loads [:i+1] on board, back to front point i has loads [i:] on board
+    (same convention as loaddiagram.calculate_passenger_points).
+    Parameters:
+    weights: np.ndarray of load weights, ordered front to back
+    cgs: np.ndarray of load cgs, same length as weights
+    base_weight, base_moment: weight and moment already on board
+    Returns:
+    (front_cg, front_weight), (back_cg, back_weight): np.ndarrays with one entry per load
+    """
+    weights = np.asarray(weights,dtype=float)
+    cgs = np.asarray(cgs,dtype=float)
+
+    front = cumulative_loading(weights,cgs,base_weight,base_moment)
+
+    #suffix sums: cumulative loading of the reversed arrays, reversed back
+    back_cg, back_weight = cumulative_loading(weights[::-1],cgs[::-1],base_weight,base_moment)
+
+    return front, (back_cg[::-1], back_weight[::-1])
+
+def column_loading(pax_cgs,pax_weight,aft_to_fw=False):
+    """
+    Returns running moments and weights of one seat column loaded in order, starting empty.
+    Replaces the np.tri loading index matrices, memory stays linear in the number of seats.
+    Parameters:
+    pax_cgs: np.ndarray of seat cgs, ordered front to back
+    pax_weight: weight per passenger, scalar or np.ndarray per seat
+    aft_to_fw: load the column from the back instead of from the front
+    Returns:
+    moments, weights: np.ndarrays of length len(pax_cgs)+1, first entry is the empty column
+    """
+    pax_cgs = np.asarray(pax_cgs,dtype=float)
+    pax_weights = np.broadcast_to(np.asarray(pax_weight,dtype=float),pax_cgs.shape)
+    if aft_to_fw:
+        pax_cgs = pax_cgs[::-1]
+        pax_weights = pax_weights[::-1]
+
+    moments = np.zeros(pax_cgs.size+1)
+    weights = np.zeros(pax_cgs.size+1)
+    np.cumsum(pax_weights*pax_cgs,out=moments[1:])
+    np.cumsum(pax_weights,out=weights[1:])
+    return moments, weights
+
+def ordering_envelope(groups,base=None,orderings=None):
+    """
+    Returns the extreme cgs over many loading orders of the same groups, in one pass.
+    The state before a group is loaded only depends on which groups are already on board,
+    so every (groups on board, next group) segment is computed once and shared by all orderings.
+    Parameters:
+    groups: sequence of loading groups (objects with .data, or 2xN arrays), moments in first row, weights in second
+    base: 2x1 np.ndarray with moment and weight already on board
+    orderings: iterable of index tuples into groups, every permutation if None
+    Returns:
+    (cg_min, ordering_min), (cg_max, ordering_max): extreme cgs and the ordering that produced them
+    """
+    data = [np.asarray(getattr(group,'data',group),dtype=float) for group in groups]
+    if base is None:
+        base = np.zeros(2)
+    if orderings is None:
+        orderings = permutations(range(len(data)))
+
+    bases = {0: np.asarray(base,dtype=float).reshape(2)} #on board bitmask -> moment, weight
+    segments = {} #(on board bitmask, group) -> min and max cg of the segment
+
+    cg_min, ordering_min = np.inf, None
+    cg_max, ordering_max = -np.inf, None
+    for ordering in orderings:
+        ordering = tuple(ordering)
+        loaded = 0
+        for g in ordering:
+            key = (loaded,g)
+            if key not in segments:
+                running = data[g] + bases[loaded].reshape(2,1)
+                cgs = running[0]/running[1]
+                segments[key] = (cgs.min(),cgs.max())
+                bases.setdefault(loaded | 1 << g,running[:,-1])
+            seg_min, seg_max = segments[key]
+            if seg_min < cg_min:
+                cg_min, ordering_min = seg_min, ordering
+            if seg_max > cg_max:
+                cg_max, ordering_max = seg_max, ordering
+            loaded |= 1 << g
+
+    return (float(cg_min),ordering_min), (float(cg_max),ordering_max)
+
+def stream_extreme_cgs(series):
+    """
+    Returns minimum and maximum cg over many series, consuming them one at a time so memory stays constant.
+    Parameters:
+    series: iterable (e.g. generator) of series, each a list of 2xN arrays with cgs in the first row, empty groups are skipped
+    Returns:
+    (cg_min, where_min), (cg_max, where_max) with where = (series index, group index, point index)
+    """
+    cg_min, where_min = np.inf, None
+    cg_max, where_max = -np.inf, None
+    for s, groups in enumerate(series):
+        for g, arr in enumerate(groups):
+            cgs = arr[0]
+            if cgs.size == 0: #e.g. a group emptied by LoadingSeries.filter
+                continue
+            i_min = np.argmin(cgs)
+            i_max = np.argmax(cgs)
+            if cgs[i_min] < cg_min:
+                cg_min, where_min = cgs[i_min], (s,g,int(i_min))
+            if cgs[i_max] > cg_max:
+                cg_max, where_max = cgs[i_max], (s,g,int(i_max))
+
+    return (cg_min,where_min), (cg_max,where_max)
+
+def exact_extreme_cgs(groups,base,linear):
+    """
+    Returns exact minimum and maximum cg [m] of groups loaded in order on base, including the empty state.
+    A linear group adds its load at one xcg, so its cg (M+w*x)/(W+w) is monotonic in w and the extremes of the
+    continuous line are at its end points: only the end point is evaluated. Other groups are evaluated at every point.
+    Parameters:
+    groups: list of 2xN running moments/weights
+    base: 2x1 moment/weight
+    linear: list of bool, one per group
+    """
+    moment, weight = base[0,0], base[1,0]
+    cg_min = cg_max = moment/weight
+    for data, is_linear in zip(groups,linear):
+        points = data[:,-1:] if is_linear else data
+        cgs = (points[0]+moment)/(points[1]+weight)
+        cg_min, cg_max = min(cg_min,cgs.min()), max(cg_max,cgs.max())
+        moment, weight = data[0,-1]+moment, data[1,-1]+weight
+
+    return float(cg_min), float(cg_max)
@@ -0,0 +1,130 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import partial
+from weightbalance import ATR72_600, LoadingDiagram
+from seatmap import seat_map
+from profiling import pool_map
+
+#Monte Carlo boarding simulation: random passenger weights, load factors and seat-fill orders.
+#Trials are sampled as (trials x seats) arrays in chunks, cg trajectories come from one cumsum along the seat axis.
+#Per boarding step the cgs are binned into a fixed histogram. The per-trial extremes are kept as arrays of length trials,
+#with keep_trials=False only their histograms are kept, so memory no longer grows with the number of trials.
+
+
+@dataclass(slots=True)
+class MonteCarloResult:
+    """
+    percentiles: requested percentiles [%]
+    cg_min, cg_max: most forward and aft cg [%LEMAC] of every trial, None if the trials were not kept
+    envelope: cg [%LEMAC] per percentile (rows) and number of boarded passengers (columns, 1..seats), nan if never reached
+    extreme_histogram: (2 x bins) histogram of the per-trial forward (row 0) and aft (row 1) cg over cg_bins
+    """
+    percentiles: np.ndarray
+    cg_min: np.ndarray | None
+    cg_max: np.ndarray | None
+    envelope: np.ndarray
+    extreme_histogram: np.ndarray
+    cg_bins: np.ndarray
+
+    def extreme_percentiles(self):
+        "Returns percentiles of the per-trial forward and aft cg, to the bin center if the trials were not kept."
+        if self.cg_min is None:
+            forward, aft = histogram_percentiles(self.extreme_histogram,self.cg_bins,self.percentiles).T
+            return forward, aft
+        return np.percentile(self.cg_min,self.percentiles), np.percentile(self.cg_max,self.percentiles)
+
+def seat_xcgs(aircraft):
+    "Returns xcg [m] of every seat, front to back, all seats of a row next to each other."
+    return seat_map(aircraft)["xcg"]
+
+def bin_index(cg,cg_bins):
+    "Returns histogram bin of every cg, cgs outside cg_bins in the outer bins."
+    return np.clip(np.searchsorted(cg_bins,cg,side='right')-1,0,cg_bins.size-2)
+
+def simulate_chunk(trials,seed,aircraft=ATR72_600,base=None,load_factor=(0.6,1.0),pax_weight_std=15.,cg_bins=np.linspace(-0.5,1.5,801)):
+    """
+    Simulates trials boardings. Returns per-trial cg_min, cg_max and a (seats x bins) histogram of cg per boarding step.
+    Parameters:
+    seed: seed or np.random.SeedSequence of this chunk
+    base: 2x1 moment/weight on board before boarding, structure of the aircraft if None
+    load_factor: (min, max) of the uniformly sampled load factor
+    pax_weight_std: standard deviation of the passenger weight [kg], mean is aircraft.avg_pax_weight
+    cg_bins: histogram bin edges [%LEMAC], cgs outside are counted in the outer bins
+    """
+    rng = np.random.default_rng(seed)
+    diagram = LoadingDiagram(aircraft)
+    if base is None:
+        base = diagram.Structure
+    seats = seat_xcgs(aircraft)
+
+    #random seat-fill order per trial, passengers beyond the load factor weigh nothing
+    order = np.argsort(rng.random((trials,seats.size)),axis=1)
+    boarded = np.rint(rng.uniform(*load_factor,trials)*seats.size).astype(int)
+    on_board = np.arange(seats.size) < boarded[:,None]
+    weights = np.clip(rng.normal(aircraft.avg_pax_weight,pax_weight_std,(trials,seats.size)),40,None)*on_board
+
+    weight = base[1,0] + np.cumsum(weights,axis=1)
+    moment = base[0,0] + np.cumsum(weights*seats[order],axis=1)
+    cg = diagram.to_LEMAC(moment/weight,isArray=False)
+
+    cg_empty = diagram.to_LEMAC(base[0,0]/base[1,0],isArray=False)
+    cg_min = np.minimum(np.where(on_board,cg,np.inf).min(axis=1),cg_empty)
+    cg_max = np.maximum(np.where(on_board,cg,-np.inf).max(axis=1),cg_empty)
+
+    nbins = cg_bins.size-1
+    bins = bin_index(cg,cg_bins)
+    steps = np.broadcast_to(np.arange(seats.size)*nbins,cg.shape)
+    histogram = np.bincount((steps+bins)[on_board],minlength=seats.size*nbins).reshape(seats.size,nbins)
+    return cg_min, cg_max, histogram
+
+def histogram_percentiles(histogram,cg_bins,percentiles):
+    "Returns cg per percentile (rows) and step (columns) from a (steps x bins) histogram, nan for empty steps."
+    counts = histogram.sum(axis=1)
+    cdf = np.cumsum(histogram,axis=1)
+    centers = 0.5*(cg_bins[1:]+cg_bins[:-1])
+
+    envelope = np.full((len(percentiles),histogram.shape[0]),np.nan)
+    for i, p in enumerate(percentiles):
+        index = np.argmax(cdf >= np.ceil(p/100*counts)[:,None].clip(1),axis=1)
+        envelope[i] = np.where(counts > 0,centers[index],np.nan)
+    return envelope
+
+def simulate(trials,chunksize=10000,seed=None,percentiles=(1,5,50,95,99),max_workers=1,cg_bins=np.linspace(-0.5,1.5,801),
+             keep_trials=True,**kwargs):
+    """
+    Runs trials boarding simulations in chunks of chunksize, optionally in a process pool (max_workers > 1 or None).
+    keep_trials: keep the per-trial cg_min and cg_max (memory O(trials)), else only their histograms (memory O(chunksize))
+    kwargs are passed to simulate_chunk. Returns MonteCarloResult.
+    """
+    sizes = [min(chunksize,trials-start) for start in range(0,trials,chunksize)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    run = partial(simulate_chunk,cg_bins=cg_bins,**kwargs)
+
+    nbins = cg_bins.size-1
+    cg_min = np.empty(trials) if keep_trials else None
+    cg_max = np.empty(trials) if keep_trials else None
+    extreme_histogram = np.zeros((2,nbins),dtype=np.intp)
+    histogram = None
+    start = 0
+    with (nullcontext() if max_workers == 1 else ProcessPoolExecutor(max_workers=max_workers)) as executor:
+        chunks = map(run,sizes,seeds) if executor is None else pool_map(executor,run,sizes,seeds)
+        for (chunk_min, chunk_max, chunk_histogram), size in zip(chunks,sizes):
+            if keep_trials:
+                cg_min[start:start+size] = chunk_min
+                cg_max[start:start+size] = chunk_max
+            extreme_histogram[0] += np.bincount(bin_index(chunk_min,cg_bins),minlength=nbins)
+            extreme_histogram[1] += np.bincount(bin_index(chunk_max,cg_bins),minlength=nbins)
+            histogram = chunk_histogram if histogram is None else histogram+chunk_histogram
+            start += size
+
+    percentiles = np.asarray(percentiles,dtype=float)
+    return MonteCarloResult(percentiles,cg_min,cg_max,histogram_percentiles(histogram,cg_bins,percentiles),
+                            extreme_histogram,cg_bins)
+
+if __name__=="__main__":
+    result = simulate(100000,seed=1)
+    forward, aft = result.extreme_percentiles()
+    for p, fw, af in zip(result.percentiles,forward,aft):
+        print(f'P{p:g}: Minimum cg: {fw}\tMaximum cg: {af}')
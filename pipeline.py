@@ -0,0 +1,153 @@
+import numpy as np
+from dataclasses import replace
+from weightbalance import ATR72_600, structure, build_group, group_builders, lemac_fields, structure_fields, extract_extreme_cgs, convert_LEMAC_percent, loading_orders
+from scissor import required_ShS
+
+#Dependency-tracked loading diagram: every stage is a node with the nodes (or Aircraft fields) it reads as inputs.
+#Nodes are computed on first access and kept until one of their inputs changes, Pipeline.set only drops the
+#nodes downstream of the changed fields. Series are split into segments keyed on the groups loaded so far,
+#so a changed group only recomputes the segments from its position in each loading order onwards.
+#
+#nodes:
+#   field name                  Aircraft field
+#   "Structure", "offset"       static base, OEW-Wmin added to the plotted weights
+#   ("group", name)             moment/weight data of a group
+#   ("base", prefix)            2x1 moment/weight after loading the groups in prefix
+#   ("segment", prefix)         cg [m]/weight of the last group of prefix
+#   ("lemac", prefix)           segment in %LEMAC
+#   ("extremes", key)           min/max cg of loading order key, e.g. '01'
+#   "extremes", "ShS"           min/max cg over the orders of the pipeline, required Sh/S
+
+
+def canonical(name):
+    "Both variants of a group (e.g. CargoF1, CargoF2) share their data."
+    return name[:-1]+"1" if name.endswith("2") else name
+
+class Pipeline:
+    """
+    Incrementally recomputed loading diagram and tail sizing of one Aircraft.
+    Parameters:
+    orders: loading orders taken into account for the extremes and Sh/S
+    n: aircraft index in scissor
+    """
+    __slots__ = ("aircraft","orders","n","computed","_inputs","_compute","_dependents","_values")
+
+    def __init__(self,aircraft=ATR72_600,orders=("0","5"),n=0):
+        self.aircraft = aircraft
+        self.orders = orders
+        self.n = n
+        self.computed = [] #nodes computed since the last set
+        self._inputs = {}
+        self._compute = {}
+        self._dependents = {}
+        self._values = {}
+
+    def _define(self,name):
+        "Returns inputs and compute function of node name."
+        if isinstance(name,str):
+            if name == "Structure":
+                return structure_fields, lambda *_: structure(self.aircraft)
+            if name == "offset":
+                return ("OEW","Structure"), lambda OEW, Structure: OEW-float(Structure[1,0])
+            if name == "extremes":
+                keys = [order+variant for order in self.orders for variant in "12"]
+                return [("extremes",key) for key in keys], lambda *extremes: (min(e[0] for e in extremes),max(e[1] for e in extremes))
+            if name == "ShS":
+                return ("extremes",), lambda extremes: required_ShS(*extremes,self.n)
+            if not hasattr(self.aircraft,name):
+                raise KeyError(name)
+            return (), lambda: getattr(self.aircraft,name)
+
+        kind, arg = name
+        if kind == "group":
+            fields = group_builders[arg][1] if arg in group_builders else ()
+            return fields, lambda *_: build_group(self.aircraft,arg).data
+        if kind == "base":
+            if not arg:
+                return ("Structure",), lambda Structure: Structure
+            return (("base",arg[:-1]),("group",arg[-1])), lambda base, data: base+data[:,-1:]
+        if kind == "segment":
+            return (("base",arg[:-1]),("group",arg[-1]),"offset"), self._segment
+        if kind == "lemac":
+            return (("segment",arg),*lemac_fields), self._lemac
+        if kind == "extremes":
+            names = tuple(canonical(name) for name in loading_orders[arg[0]][int(arg[1])-1])
+            return [("lemac",names[:i+1]) for i in range(len(names))], lambda *series: extract_extreme_cgs(list(series))
+        raise KeyError(name)
+
+    @staticmethod
+    def _segment(base,data,offset):
+        running = data + base
+        return np.vstack([running[0]/running[1],running[1]+offset])
+
+    @staticmethod
+    def _lemac(segment,xcg_wing,xcg_mac,xcg_lemac):
+        return convert_LEMAC_percent(segment,xcg_mac/xcg_lemac,xcg_wing-xcg_mac)
+
+    def _register(self,name):
+        if name in self._inputs:
+            return
+        inputs, compute = self._define(name)
+        self._inputs[name] = tuple(inputs)
+        self._compute[name] = compute
+        for node in inputs:
+            self._register(node)
+            self._dependents.setdefault(node,set()).add(name)
+
+    def get(self,name):
+        "Returns value of node name, computing it and its missing inputs."
+        if name not in self._values:
+            self._register(name)
+            self._values[name] = self._compute[name](*(self.get(node) for node in self._inputs[name]))
+            self.computed.append(name)
+        return self._values[name]
+
+    def invalidate(self,name):
+        "Drops the value of node name and of every node depending on it."
+        stack = [name]
+        while stack:
+            node = stack.pop()
+            self._values.pop(node,None)
+            stack.extend(dependent for dependent in self._dependents.get(node,()) if dependent in self._values)
+
+    def set(self,**changes):
+        """
+        Replaces Aircraft fields, e.g. set(cargo_aft_xcg=21.), and invalidates the nodes reading them.
+        Returns names of the fields that changed value.
+        """
+        aircraft = replace(self.aircraft,**changes)
+        changed = [field for field in changes if getattr(aircraft,field) != getattr(self.aircraft,field)]
+        self.aircraft = aircraft
+        self.computed = []
+        for field in changed:
+            self.invalidate(field)
+        return changed
+
+    def get_series(self,key):
+        """
+        Returns series of loading order key, e.g. '01', in %LEMAC.
+        """
+        names = tuple(canonical(name) for name in loading_orders[key[0]][int(key[1])-1])
+        return [self.get(("lemac",names[:i+1])) for i in range(len(names))]
+
+    def extreme_cgs(self):
+        "Returns minimum and maximum cg in %LEMAC over both variants of the orders of the pipeline."
+        return self.get("extremes")
+
+    def ShS(self):
+        "Returns required Sh/S of the cg range of the orders of the pipeline."
+        return self.get("ShS")
+
+if __name__=="__main__":
+    from time import perf_counter
+
+    pipeline = Pipeline()
+    start = perf_counter()
+    print(f'Minimum cg, maximum cg: {pipeline.extreme_cgs()}\tSh/S: {pipeline.ShS()}')
+    print(f'full build: {len(pipeline.computed)} nodes, {1e3*(perf_counter()-start):.2f} ms')
+
+    for field, value in (("cargo_aft_xcg",21.),("fuel_xcg",12.),("xcg_wing",12.3)):
+        pipeline.set(**{field: value})
+        start = perf_counter()
+        print(f'{field}={value}: Minimum cg, maximum cg: {pipeline.extreme_cgs()}\tSh/S: {pipeline.ShS()}')
+        print(f'  recomputed {len(pipeline.computed)} nodes, {1e3*(perf_counter()-start):.2f} ms')
@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import atexit
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import wraps, partial
+
+#Opt-in instrumentation of the analysis pipeline, enabled by setting LOADDIAGRAM_PROFILE to the output file, e.g.
+#LOADDIAGRAM_PROFILE=profile.json python loaddiagram_HE.py   (LOADDIAGRAM_PROFILE=1 writes loaddiagram_profile.json)
+#Stages are functions decorated with @stage and blocks wrapped in timed(), imports of the repo modules, numpy and
+#matplotlib are timed by a sys.meta_path finder, so importlib.import_module is covered too. Import profiling first,
+#modules imported before it are not timed. Stats of process pool workers are merged into the profile by pool_map.
+#At exit the JSON profile lists per stage the calls, inclusive time and net allocated memory (tracemalloc), slowest first.
+#Times of worker stages add up over processes, and tracemalloc slows allocation heavy code such as imports down.
+#When disabled @stage returns the function itself and timed() a shared null context, so there is no overhead.
+
+
+output = os.environ.get("LOADDIAGRAM_PROFILE")
+if output == "1":
+    output = "loaddiagram_profile.json"
+enabled = bool(output)
+
+stats = {} #stage name: [calls, total time, min time, max time, net allocated bytes]
+_null = nullcontext()
+
+def record(name,elapsed,allocated):
+    entry = stats.get(name)
+    if entry is None:
+        stats[name] = [1,elapsed,elapsed,elapsed,allocated]
+        return
+    entry[0] += 1
+    entry[1] += elapsed
+    entry[2] = min(entry[2],elapsed)
+    entry[3] = max(entry[3],elapsed)
+    entry[4] += allocated
+
+@contextmanager
+def _timed(name):
+    memory = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name,time.perf_counter()-start,tracemalloc.get_traced_memory()[0]-memory)
+
+def timed(name):
+    "Returns context manager timing its block as stage name."
+    return _timed(name) if enabled else _null
+
+def stage(name=None):
+    """
+    Decorator timing every call of the function as stage name (default module.qualname).
+    """
+    def decorate(func):
+        if not enabled:
+            return func
+        label = name or f'{func.__module__}.{func.__qualname__}'
+        @wraps(func)
+        def wrapper(*args,**kwargs):
+            with _timed(label):
+                return func(*args,**kwargs)
+        return wrapper
+    return decorate
+
+def collect(func,*args):
+    "Returns func(*args) and the stats recorded during the call, for a process pool worker to send back."
+    global stats
+    saved, stats = stats, {}
+    try:
+        return func(*args), stats
+    finally:
+        stats = saved
+
+def merge(worker_stats):
+    "Adds stats recorded in another process."
+    for name, (calls, total, tmin, tmax, allocated) in worker_stats.items():
+        entry = stats.setdefault(name,[0,0.,tmin,tmax,0])
+        entry[0] += calls
+        entry[1] += total
+        entry[2] = min(entry[2],tmin)
+        entry[3] = max(entry[3],tmax)
+        entry[4] += allocated
+
+def _merged(results):
+    for result, worker_stats in results:
+        merge(worker_stats)
+        yield result
+
+def pool_map(executor,func,*iterables):
+    "Returns executor.map(func,*iterables), when enabled the stats of the worker calls are merged into this process."
+    if not enabled:
+        return executor.map(func,*iterables)
+    return _merged(executor.map(partial(collect,func),*iterables))
+
+#modules whose (first) import is timed, including the modules they import
+timed_imports = {"numpy","matplotlib","matplotlib.pyplot","matplotlib.figure","matplotlib.backends.backend_agg",
+                 "loaddiagram","loaddiagram_improved","loaddiagram_HE","scissorplot","scissor","weightbalance",
+                 "render","sweep","pipeline","montecarlo","workbook"}
+
+class _TimedLoader:
+    "Loader wrapper timing exec_module, everything else is delegated."
+
+    def __init__(self,loader,name):
+        self._loader = loader
+        self._name = name
+
+    def create_module(self,spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self,module):
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        with _timed(f'import {self._name}'):
+            self._loader.exec_module(module)
+
+    def __getattr__(self,name):
+        return getattr(self._loader,name)
+
+class _TimedImportFinder:
+    "sys.meta_path finder wrapping the loader of the timed_imports modules."
+
+    @classmethod
+    def find_spec(cls,name,path=None,target=None):
+        if name not in timed_imports:
+            return None
+        for finder in sys.meta_path:
+            if finder is cls or not hasattr(finder,"find_spec"):
+                continue
+            spec = finder.find_spec(name,path,target)
+            if spec is not None:
+                if hasattr(spec.loader,"exec_module"):
+                    spec.loader = _TimedLoader(spec.loader,name)
+                return spec
+        return None
+
+def profile():
+    "Returns the profile as dict: wall time, peak traced memory and the stages, slowest (inclusive time) first."
+    stages = [{"stage": name, "calls": calls, "total": total, "mean": total/calls, "min": tmin, "max": tmax, "allocated": allocated}
+              for name, (calls, total, tmin, tmax, allocated) in stats.items()]
+    stages.sort(key=lambda entry: entry["total"],reverse=True)
+    return {"argv": sys.argv, "wall": time.perf_counter()-_start, "peak_memory": tracemalloc.get_traced_memory()[1], "stages": stages}
+
+def write_profile(path=None):
+    "Writes the profile as JSON to path (default the LOADDIAGRAM_PROFILE file)."
+    with open(path or output,"w") as file:
+        json.dump(profile(),file,indent=1)
+
+_start = time.perf_counter()
+if enabled:
+    tracemalloc.start()
+    sys.meta_path.insert(0,_TimedImportFinder)
+    atexit.register(write_profile)
@@ -0,0 +1,90 @@
+import importlib
+from profiling import stage, timed, pool_map
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+#Headless batch rendering on the Agg canvas with explicit Figure objects, no pyplot state and no display needed.
+#A job is a dict, e.g.
+#{"plot": "loaddiagram", "aircraft": "ATR72_HE", "order": "5", "output": "figures/loaddiagram_extreme_HE", "formats": ["pdf"]}
+#{"plot": "scissorplot", "aircraft": "ATR72_HE", "output": "figures/scissorplot1_new", "formats": ["pdf"]}
+#Scissor plot jobs select the aircraft by name or by its index "n" in scissor, the cg range is the one of that aircraft.
+#Jobs without "output" only return the numeric cg envelope and draw nothing.
+
+
+loaddiagram_modules = {"ATR72_600": "loaddiagram_improved", "ATR72_HE": "loaddiagram_HE"}
+scissorplot_index = {"ATR72_600": 0, "ATR72_HE": 1} #n of the aircraft in scissor
+scissorplot_aircraft = {n: name for name, n in scissorplot_index.items()}
+
+def new_figure(figsize,**kwargs):
+    "Returns a Figure with an Agg canvas attached."
+    fig = Figure(figsize=figsize,**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+def save_figure(fig,output,formats):
+    "Writes fig to output.<format> for every format, returns the file names."
+    files = [f'{output}.{fmt}' for fmt in formats]
+    for file in files:
+        with timed("savefig"):
+            fig.savefig(file)
+    return files
+
+def render_loaddiagram(job):
+    module = importlib.import_module(loaddiagram_modules[job.get("aircraft","ATR72_600")])
+    pair = module.get_pair(job.get("order","0"))
+    cg_min, cg_max = module.extract_extreme_cgs(*pair[:2])
+    result = {"cg_min": cg_min, "cg_max": cg_max, "files": []}
+    if job.get("output") is None:
+        return result
+
+    fig = new_figure((10, 7))
+    module.draw_loaddiagram(fig.add_subplot(),*pair)
+    result["files"] = save_figure(fig,job["output"],job.get("formats",("png",)))
+    return result
+
+def render_scissorplot(job):
+    import scissor
+    aircraft = job.get("aircraft",scissorplot_aircraft[job.get("n",1)])
+    n = job.get("n",scissorplot_index[aircraft])
+    module = importlib.import_module(loaddiagram_modules[aircraft])
+    cg_min, cg_max = module.diagram.extreme_cgs()
+    result = {"cg_min": cg_min, "cg_max": cg_max, "ShS": float(scissor.required_ShS(cg_min,cg_max,n)), "files": []}
+    if job.get("output") is None:
+        return result
+
+    from scissorplot import draw_scissorplot, titles
+    fig = new_figure((12, 8),constrained_layout=True)
+    draw_scissorplot(fig.add_subplot(), scissor.x_ac_c[n], scissor.x_ac_s[n], scissor.l_h, scissor.mac, scissor.VhV, scissor.SM,
+                     scissor.Cla_h[n], scissor.Cla_Ah_stat[n], scissor.deda[n], scissor.CL_h[n], scissor.Cm_ac[n],
+                     scissor.Cl_ah_cont[n], n, cg_range=(cg_min, cg_max), range_name=titles[scissorplot_index[aircraft]])
+    result["files"] = save_figure(fig,job["output"],job.get("formats",("pdf",)))
+    return result
+
+renderers = {"loaddiagram": render_loaddiagram, "scissorplot": render_scissorplot}
+
+@stage()
+def render(job):
+    """
+    Runs one job, returns dict with cg_min, cg_max (%LEMAC), files written and, for scissor plots, the required Sh/S.
+    """
+    return renderers[job["plot"]](job)
+
+def render_all(jobs,max_workers=None):
+    """
+    Runs many jobs in a process pool, results are returned in job order. max_workers=1 runs in this process.
+    """
+    if max_workers == 1:
+        return [render(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(pool_map(executor,render,jobs))
+
+if __name__=="__main__":
+    jobs = [
+        {"plot": "loaddiagram", "aircraft": "ATR72_600", "order": "0", "output": "figures/loaddiagram", "formats": ["png"]},
+        {"plot": "loaddiagram", "aircraft": "ATR72_600", "order": "5", "output": "figures/loaddiagram_extreme", "formats": ["png"]},
+        {"plot": "loaddiagram", "aircraft": "ATR72_HE", "order": "5", "output": "figures/loaddiagram_extreme_HE", "formats": ["pdf"]},
+        {"plot": "scissorplot", "n": 1, "output": "figures/scissorplot1_new", "formats": ["pdf"]},
+    ]
+    for job, result in zip(jobs,render_all(jobs)):
+        print(f'{job["output"]}: Minimum cg: {result["cg_min"]}\tMaximum cg: {result["cg_max"]}')
@@ -0,0 +1,68 @@
+import json
+import argparse
+from render import render, render_all
+
+#Command line entry point regenerating figures and cg envelopes from a job file, run with e.g.
+#python report.py report.json -j 4 --results results.json
+#A job file is a JSON list of render jobs or {"defaults": {...}, "jobs": [...]}, with per job (see render.py)
+#"plot", "aircraft", "order" or a list of "orders", "output" and "formats". The output may contain {aircraft}, {order} and {plot}.
+#All envelopes are computed in this process first, so imports and assembled series are shared by every job,
+#the figures are then drawn in a process pool forked from this warmed-up process.
+
+
+def expand_jobs(spec):
+    """
+    Returns list of render jobs of job file contents spec: defaults applied and one job per entry of "orders".
+    """
+    if isinstance(spec,list):
+        spec = {"jobs": spec}
+    defaults = spec.get("defaults",{})
+
+    jobs = []
+    for entry in spec["jobs"]:
+        entry = {**defaults,**entry}
+        orders = entry.pop("orders",[entry.get("order","0")] if entry["plot"] == "loaddiagram" else [None])
+        for order in orders:
+            job = dict(entry)
+            if order is not None:
+                job["order"] = order
+            if job.get("output") is not None:
+                job["output"] = job["output"].format(aircraft=job.get("aircraft",""),order=order or "",plot=job["plot"])
+            jobs.append(job)
+    return jobs
+
+def load_jobs(path):
+    "Returns expanded jobs of the job file path."
+    with open(path) as file:
+        return expand_jobs(json.load(file))
+
+def run(jobs,max_workers=None,draw=True):
+    """
+    Returns results of jobs (as render), envelopes computed in this process and figures drawn in parallel.
+    Parameters:
+    max_workers: processes drawing figures, 1 draws in this process
+    draw: False only computes the envelopes
+    """
+    results = [render(dict(job,output=None)) for job in jobs]
+    drawn = [i for i, job in enumerate(jobs) if draw and job.get("output") is not None]
+    for i, result in zip(drawn,render_all([jobs[i] for i in drawn],max_workers)):
+        results[i] = result
+    return results
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="Regenerates loading diagrams and scissor plots from a job file.")
+    parser.add_argument("jobfile",help="JSON job file")
+    parser.add_argument("-j","--jobs",type=int,default=None,dest="max_workers",help="processes drawing figures, default one per CPU")
+    parser.add_argument("--no-draw",action="store_false",dest="draw",help="only compute the cg envelopes")
+    parser.add_argument("--results",help="write the results of every job to this JSON file")
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.jobfile)
+    results = run(jobs,args.max_workers,args.draw)
+    for job, result in zip(jobs,results):
+        label = job.get("output") or f'{job["plot"]} {job.get("aircraft","")} {job.get("order","")}'.strip()
+        ShS = f'\tSh/S: {result["ShS"]}' if "ShS" in result else ""
+        print(f'{label}: Minimum cg: {result["cg_min"]}\tMaximum cg: {result["cg_max"]}{ShS}')
+    if args.results:
+        with open(args.results,"w") as file:
+            json.dump([{**job,**result} for job, result in zip(jobs,results)],file,indent=1)
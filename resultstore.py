@@ -0,0 +1,227 @@
+import os
+import re
+import hashlib
+import tempfile
+import operator
+import numpy as np
+from dataclasses import astuple, replace
+from weightbalance import Aircraft, LoadingDiagram, LoadingSeries
+from workbook import record_dtype
+from scissor import required_ShS
+
+#Columnar on-disk store of loading envelopes, loading series and tail sizing results.
+#A table is a directory of row groups, every row group a directory with one .npy file per column:
+#   <store>/<table>/rg-00000/cg_max.npy ...
+#Columns are memory-mapped when read, so a query only pages in the columns it uses. Rows are identified by the
+#hash of their configuration (Aircraft, loading orders and scissor aircraft index n).
+#Loading series are kept as LoadingSeries points (points.npy, offsets.npy) next to the columns of the "series" table.
+#Tables hold every configuration once: append skips rows whose hash (and key for series) is already stored.
+#
+#tables written by store_diagram and store_sweep:
+#   envelopes   one row per configuration: hash, Aircraft fields, orders, n, cg_min, cg_max, ShS
+#   series      one row per loading order key: hash, key, cg_min, cg_max and its points
+
+
+default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),".cache","results")
+row_group_name = re.compile(r"rg-(\d+)$") #finished row groups, writes go to .tmp-* directories first
+operators = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "==": operator.eq, "!=": operator.ne}
+
+def config_hash(aircraft,orders=("0","5"),n=1):
+    """
+    Returns hex digest identifying a configuration. The Aircraft fields are hashed as record_dtype(Aircraft),
+    so equal configurations match whether a field holds an int or a float (presets, workbook, stored rows).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.array(astuple(aircraft),dtype=record_dtype(Aircraft)).tobytes())
+    h.update(repr((tuple(orders),int(n))).encode())
+    return h.hexdigest()
+
+class RowGroup:
+    """
+    Memory-mapped columns of one row group, loaded on first access.
+    """
+    __slots__ = ("path","names","_columns")
+
+    def __init__(self,path):
+        self.path = path
+        self.names = sorted(file[:-4] for file in os.listdir(path) if file.endswith(".npy"))
+        self._columns = {}
+
+    def __getitem__(self,name):
+        if name not in self._columns:
+            if name not in self.names:
+                raise KeyError(name)
+            self._columns[name] = np.load(os.path.join(self.path,f'{name}.npy'),mmap_mode='r')
+        return self._columns[name]
+
+    def __len__(self):
+        return len(self["hash"])
+
+    def rows(self,index,columns):
+        "Returns structured array of columns (names) at index."
+        columns = [name for name in columns if name in self.names]
+        out = np.empty(len(index),dtype=[(name,self[name].dtype) for name in columns])
+        for name in columns:
+            out[name] = self[name][index]
+        return out
+
+class ResultStore:
+    """
+    Columnar store of tables of results in directory path.
+    """
+    __slots__ = ("path","_index")
+
+    def __init__(self,path=default_path):
+        self.path = path
+        self._index = {}
+
+    def row_groups(self,table):
+        "Returns RowGroups of table in write order."
+        directory = os.path.join(self.path,table)
+        if not os.path.isdir(directory):
+            return []
+        return [RowGroup(os.path.join(directory,name)) for name in sorted(os.listdir(directory)) if row_group_name.match(name)]
+
+    def contains(self,table,row,unique=("hash",)):
+        "Returns whether table has a row equal to row in the columns unique (which include hash)."
+        return any(all(group[name][index] == row[name] for name in unique) for group, index in self.locate(table,str(row["hash"])))
+
+    def append(self,table,rows,series=None,unique=("hash",)):
+        """
+        Writes structured array rows (with a hash column) as a new row group of table, returns its directory.
+        Rows equal in the columns unique to a stored row or an earlier row are skipped, None is returned if none are left.
+        series: optional list of LoadingSeries, one per row
+        """
+        seen = set()
+        keep = []
+        for i, row in enumerate(rows):
+            identity = tuple(row[name].item() for name in unique)
+            if identity not in seen and not self.contains(table,row,unique):
+                seen.add(identity)
+                keep.append(i)
+        if not keep:
+            return None
+        if len(keep) < len(rows):
+            rows = rows[keep]
+            series = None if series is None else [series[i] for i in keep]
+
+        directory = os.path.join(self.path,table)
+        os.makedirs(directory,exist_ok=True)
+        existing = [int(match[1]) for match in map(row_group_name.match,os.listdir(directory)) if match]
+        path = os.path.join(directory,f'rg-{max(existing,default=-1)+1:05d}')
+        tmp = tempfile.mkdtemp(prefix=".tmp-",dir=directory) #leftovers of interrupted writes are never read
+
+        for name in rows.dtype.names:
+            np.save(os.path.join(tmp,f'{name}.npy'),np.ascontiguousarray(rows[name]))
+        if series is not None:
+            lengths = np.array([len(s.points) for s in series])
+            counts = np.array([len(s.offsets) for s in series])
+            np.save(os.path.join(tmp,"points.npy"),np.concatenate([s.points for s in series]))
+            np.save(os.path.join(tmp,"offsets.npy"),np.concatenate([s.offsets for s in series]))
+            np.save(os.path.join(tmp,"points_start.npy"),np.cumsum(lengths)-lengths)
+            np.save(os.path.join(tmp,"offsets_start.npy"),np.cumsum(counts)-counts)
+            np.save(os.path.join(tmp,"offsets_count.npy"),counts)
+        os.replace(tmp,path)
+        self._index.pop(table,None)
+        return path
+
+    def query(self,table,where,columns=None):
+        """
+        Returns structured array of the rows of table matching where, e.g. query("envelopes",("cg_max","<",0.5)).
+        Parameters:
+        where: (column, operator, value) or function of a RowGroup returning a bool mask, row groups without
+               the columns it reads are skipped
+        columns: column names to return, all except the series bookkeeping if None
+        """
+        if isinstance(where,tuple):
+            name, op, value = where
+            where = lambda group: operators[op](group[name],value)
+
+        parts = []
+        for group in self.row_groups(table):
+            try:
+                index = np.flatnonzero(where(group))
+            except KeyError:
+                continue
+            if index.size:
+                names = columns or [name for name in group.names if name not in ("points","offsets","points_start","offsets_start","offsets_count")]
+                parts.append(group.rows(index,names))
+        if not parts:
+            return np.empty(0,dtype=[("hash","U32")])
+        return np.concatenate(parts)
+
+    def locate(self,table,key):
+        "Returns list of (RowGroup, row) of the rows of table with hash key."
+        if table not in self._index:
+            index = {}
+            for group in self.row_groups(table):
+                for row, value in enumerate(group["hash"]):
+                    index.setdefault(str(value),[]).append((group,row))
+            self._index[table] = index
+        return self._index[table].get(key,[])
+
+    def series(self,key,order_key):
+        "Returns stored LoadingSeries (read-only, memory-mapped) of configuration key and loading order order_key, e.g. '01'."
+        for group, row in self.locate("series",key):
+            if group["key"][row] == order_key:
+                start, count = group["offsets_start"][row], group["offsets_count"][row]
+                offsets = np.asarray(group["offsets"][start:start+count])
+                points_start = group["points_start"][row]
+                return LoadingSeries(group["points"][points_start:points_start+offsets[-1]],offsets,
+                                     (None,)*(count-1),(None,)*(count-1))
+        raise KeyError((key,order_key))
+
+def envelope_rows(aircraft_list,orders,n,cg_min,cg_max,ShS):
+    "Returns envelopes table rows."
+    rows = np.empty(len(aircraft_list),dtype=[("hash","U32"),*record_dtype(Aircraft).descr,("orders","U16"),("n","i8"),
+                                              ("cg_min","f8"),("cg_max","f8"),("ShS","f8")])
+    rows["hash"] = [config_hash(aircraft,orders,n) for aircraft in aircraft_list]
+    rows[list(record_dtype(Aircraft).names)] = np.array([astuple(aircraft) for aircraft in aircraft_list],dtype=record_dtype(Aircraft))
+    rows["orders"] = ",".join(orders)
+    rows["n"] = n
+    rows["cg_min"], rows["cg_max"], rows["ShS"] = cg_min, cg_max, ShS
+    return rows
+
+def store_diagram(store,diagram,orders=("0","5"),n=1):
+    """
+    Stores envelope, required Sh/S and every loading series (%LEMAC) of orders of LoadingDiagram diagram, returns its hash.
+    A configuration that is already stored is not written again.
+    """
+    key = config_hash(diagram.aircraft,orders,n)
+    keys = [order+variant for order in orders for variant in "12"]
+    series = [diagram.get_series(order_key) for order_key in keys]
+
+    rows = np.empty(len(keys),dtype=[("hash","U32"),("key","U2"),("cg_min","f8"),("cg_max","f8")])
+    rows["hash"] = key
+    rows["key"] = keys
+    rows["cg_min"], rows["cg_max"] = np.transpose([s.extreme_cgs() for s in series])
+    store.append("series",rows,series,unique=("hash","key"))
+
+    cg_min, cg_max = rows["cg_min"].min(), rows["cg_max"].max()
+    store.append("envelopes",envelope_rows([diagram.aircraft],orders,n,cg_min,cg_max,required_ShS(cg_min,cg_max,n)))
+    return key
+
+def store_sweep(store,results,base,n=1,orders=("0","5")):
+    """
+    Stores the envelopes of sweep.sweep results of Aircraft base as one row group, returns the hashes.
+    Variants that are already stored are skipped.
+    """
+    varied = [name for name in results.dtype.names if name not in ("cg_min","cg_max","ShS")]
+    aircraft_list = [replace(base,**{name: row[name].item() for name in varied}) for row in results]
+    rows = envelope_rows(aircraft_list,orders,n,results["cg_min"],results["cg_max"],results["ShS"])
+    store.append("envelopes",rows)
+    return rows["hash"]
+
+if __name__=="__main__":
+    from weightbalance import ATR72_600, ATR72_HE
+    from sweep import sweep
+
+    store = ResultStore()
+    for aircraft, n in ((ATR72_600,0),(ATR72_HE,1)):
+        store_diagram(store,LoadingDiagram(aircraft),n=n)
+    store_sweep(store,sweep(max_workers=1,fs_group_xcg=np.linspace(12.5,13.5,21),wing_group_xcg=np.linspace(11.0,11.8,9)),ATR72_HE)
+
+    forward = store.query("envelopes",("cg_max","<",0.5),columns=["hash","name","fs_group_xcg","wing_group_xcg","cg_min","cg_max","ShS"])
+    print(f'{forward.size} stored configurations with aft cg < 0.5')
+    key = config_hash(ATR72_HE,("0","5"),1)
+    print(f'ATR 72-HE order 01 from the store: {store.series(key,"01").extreme_cgs()}')
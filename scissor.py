@@ -0,0 +1,151 @@
+from profiling import stage
+import numpy as np
+from dataclasses import dataclass
+
+#Closed-form scissor plot: inputs of the ATR72-600 and ATR72-HE, Sh/S lines, cg limits and required tail size.
+#No plotting imports, so sweeps and pool workers can size tails without loading matplotlib; scissorplot.py draws.
+
+#######################################
+#GENERAL INPUTS
+######################################
+
+
+l_h = 13.38 # Distance between aerodynamic center and horizontal tail
+mac = 2.303 # Mean aerodynamic chord
+VhV = 1 # Velocity ratio horizontal tail to aircraft
+
+SM = 0.05 # Safety margin
+
+#######################################
+# STATIC STABILITY FUNCTION
+#######################################
+
+                #ATR72-600                      # ATR72-HE
+Cla_h = [       4.233885381,                    4.233885381] # Lift coefficient horizontal tail
+Cla_Ah_stat = [ 6.199435891,                    6.375872992] # Lift coefficient aircraft without horizontal tail stat cond
+deda = [        0.265558523,                    0.227824951] # Downwash gradient
+x_ac_s =[       0.058106547,                    0.039608989]# Aerodynamic center
+
+#######################################
+# CONTRALLABILITY INPUTS
+#######################################
+                #ATR72-600                      # ATR72-HE
+CL_h = [        -0.8,                           -0.8]
+Cm_ac = [       -1.068999715,                   -1.093012671] # Moment coefficient aircraft
+Cl_ah_cont = [  1.890335912,                    1.890335912] # Lift coefficient aircraft with horizontal tail cont cond
+x_ac_c =[       0.042576066,                    0.022027301] # Aerodynamic center
+
+
+def static_gradient(l_h, mac, VhV, Cla_h, Cla_Ah_stat, deda):
+    "Returns d(Sh/S)/dx_cg of the stability line."
+    return 1/((Cla_h/Cla_Ah_stat)*(1-deda)*(l_h/mac)*VhV**2)
+
+def controllability_gradient(l_h, mac, VhV, CL_h, Cla_ah_cont):
+    "Returns d(Sh/S)/dx_cg of the controllability line (negative for a down-loaded tail)."
+    return 1/((CL_h/Cla_ah_cont)*(l_h/mac)*VhV**2)
+
+def static_stability(x_cg, SM, x_ac_s, l_h, mac, VhV, Cla_h, Cla_Ah_stat, deda):
+    """
+    Returns Sh/S of the stick fixed stability line at x_cg, all inputs broadcast as NumPy arrays.
+    """
+    gradient = static_gradient(l_h, mac, VhV, Cla_h, Cla_Ah_stat, deda)
+
+    ShS = gradient * (x_cg - x_ac_s + SM)
+    return ShS
+
+def controllability(x_cg, x_ac_c, l_h, mac, VhV, CL_h, Cm_ac, Cla_ah_cont):
+    """
+    Returns Sh/S of the controllability line at x_cg, all inputs broadcast as NumPy arrays.
+    """
+    gradient = controllability_gradient(l_h, mac, VhV, CL_h, Cla_ah_cont)
+
+    ShS = gradient * (x_cg - x_ac_c + Cm_ac/Cla_ah_cont)
+    return ShS
+
+def scissor_lines(x_cg, x_ac_c, x_ac_s, l_h, mac, VhV, SM, Cla_h, Cla_Ah_stat, deda, CL_h, Cm_ac, Cla_ah_cont):
+    """
+    Returns static_with_SM, static_without_SM and controllability Sh/S as np.ndarrays over x_cg.
+    Parameters given as arrays of length K are evaluated as K parameter sets: the result then has shape (K, len(x_cg)).
+    """
+    x_cg = np.asarray(x_cg, dtype=float)
+    p = lambda value: np.asarray(value, dtype=float)[..., np.newaxis] if np.ndim(value) else value
+    x_ac_c, x_ac_s, l_h, mac, VhV, SM, Cla_h, Cla_Ah_stat, deda, CL_h, Cm_ac, Cla_ah_cont = map(
+        p, (x_ac_c, x_ac_s, l_h, mac, VhV, SM, Cla_h, Cla_Ah_stat, deda, CL_h, Cm_ac, Cla_ah_cont))
+
+    static_with_SM = static_stability(x_cg, SM, x_ac_s, l_h, mac, VhV, Cla_h, Cla_Ah_stat, deda)
+    static_without_SM = static_stability(x_cg, 0, x_ac_s, l_h, mac, VhV, Cla_h, Cla_Ah_stat, deda)
+    controllability_values = controllability(x_cg, x_ac_c, l_h, mac, VhV, CL_h, Cm_ac, Cla_ah_cont)
+    return np.broadcast_arrays(static_with_SM, static_without_SM, controllability_values)
+
+def cg_limits(ShS, x_ac_c, x_ac_s, l_h, mac, VhV, SM, Cla_h, Cla_Ah_stat, deda, CL_h, Cm_ac, Cla_ah_cont):
+    """
+    Returns the exact forward and aft cg limits (fraction of MAC) allowed by tail size ShS.
+    Both boundaries are straight lines, so the limits are where they cross ShS. All inputs broadcast.
+    Returns:
+    x_fw: controllability limit, x_aft: stability limit (with safety margin)
+    """
+    x_fw = ShS/controllability_gradient(l_h, mac, VhV, CL_h, Cla_ah_cont) + x_ac_c - Cm_ac/Cla_ah_cont
+    x_aft = ShS/static_gradient(l_h, mac, VhV, Cla_h, Cla_Ah_stat, deda) + x_ac_s - SM
+    return x_fw, x_aft
+
+def min_ShS(cgmin, cgmax, x_ac_c, x_ac_s, l_h, mac, VhV, SM, Cla_h, Cla_Ah_stat, deda, CL_h, Cm_ac, Cla_ah_cont):
+    """
+    Returns the smallest Sh/S that is both stable at cgmax and controllable at cgmin. All inputs broadcast.
+    """
+    static = static_stability(cgmax, SM, x_ac_s, l_h, mac, VhV, Cla_h, Cla_Ah_stat, deda)
+    control = controllability(cgmin, x_ac_c, l_h, mac, VhV, CL_h, Cm_ac, Cla_ah_cont)
+    return np.maximum(static, control)
+
+@stage()
+def required_ShS(cgmin, cgmax, n, margin=0.02):
+    """
+    Returns Sh/S needed for the cg range [cgmin, cgmax] (fraction of MAC) of aircraft n, with margin on both ends:
+    stick fixed stability with safety margin at the aft limit, controllability at the forward limit.
+    """
+    return min_ShS(np.asarray(cgmin) - margin, np.asarray(cgmax) + margin, x_ac_c[n], x_ac_s[n], l_h, mac, VhV, SM,
+                   Cla_h[n], Cla_Ah_stat[n], deda[n], CL_h[n], Cm_ac[n], Cl_ah_cont[n])
+
+
+@dataclass(slots=True)
+class ScissorBatch:
+    """
+    Scissor plot results of K aircraft.
+    static_with_SM, static_without_SM, controllability: Sh/S lines, shape (K, len(x_cg)), None without x_cg
+    x_fw, x_aft: cg excursion (fraction of MAC, clipped to [0, 1]) allowed by the given Sh/S, shape (K,)
+    ShS: required Sh/S of the cg ranges, shape (K,), None without cg ranges
+    """
+    static_with_SM: np.ndarray | None
+    static_without_SM: np.ndarray | None
+    controllability: np.ndarray | None
+    x_fw: np.ndarray
+    x_aft: np.ndarray
+    ShS: np.ndarray | None
+
+def aircraft_arrays(indices=None):
+    """
+    Returns the per aircraft parameter lists of this module as arrays (keyword arguments of scissor_batch).
+    indices: aircraft to take, all if None
+    """
+    indices = slice(None) if indices is None else indices
+    lists = {"x_ac_c": x_ac_c, "x_ac_s": x_ac_s, "Cla_h": Cla_h, "Cla_Ah_stat": Cla_Ah_stat, "deda": deda,
+             "CL_h": CL_h, "Cm_ac": Cm_ac, "Cla_ah_cont": Cl_ah_cont}
+    return {name: np.asarray(values, dtype=float)[indices] for name, values in lists.items()}
+
+def scissor_batch(x_ac_c, x_ac_s, Cla_h, Cla_Ah_stat, deda, CL_h, Cm_ac, Cla_ah_cont, l_h=l_h, mac=mac, VhV=VhV, SM=SM,
+                  ShS=0.19, cgmin=None, cgmax=None, margin=0.02, x_cg=None):
+    """
+    Evaluates the scissor plot of K aircraft in one broadcasted computation, parameters are scalars or arrays of length K.
+    Parameters:
+    ShS: tail size (scalar or length K) of the cg excursion
+    cgmin, cgmax: cg ranges (fraction of MAC) to size the tail for, margin is added on both ends
+    x_cg: cg values of the Sh/S lines, lines are skipped if None (they take K*len(x_cg) memory)
+    Returns:
+    ScissorBatch
+    """
+    params = (x_ac_c, x_ac_s, l_h, mac, VhV, SM, Cla_h, Cla_Ah_stat, deda, CL_h, Cm_ac, Cla_ah_cont)
+    lines = (None, None, None) if x_cg is None else scissor_lines(x_cg, *params)
+    x_fw, x_aft = cg_limits(ShS, *params)
+    required = None
+    if cgmin is not None:
+        required = min_ShS(np.asarray(cgmin) - margin, np.asarray(cgmax) + margin, *params)
+    return ScissorBatch(*lines, np.clip(x_fw, 0, 1), np.clip(x_aft, 0, 1), required)
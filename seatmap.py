@@ -0,0 +1,115 @@
+import numpy as np
+from weightbalance import ATR72_600, LoadingDiagram
+
+#Seat map model: one structured array row per seat with its xcg, column type and row number.
+#Boarding policies are kernels returning the boarding order as seat indices (a permutation), the cg trajectory
+#of any number of orders is then one gather of the seat xcgs and one cumsum along the boarding axis.
+#Add a policy by adding a kernel f(seats,rng) to boarding_policies.
+
+
+WINDOW, MIDDLE, AISLE = 0, 1, 2
+column_types = {"W": WINDOW, "M": MIDDLE, "A": AISLE}
+seat_dtype = np.dtype([("xcg",float),("column",np.int8),("row",np.intp)])
+
+def aircraft_layout(aircraft):
+    "Returns seat layout of a row of aircraft as a string of W, M, A from left to right, e.g. 'WAAW'."
+    left = "W"*-(-aircraft.window_columns//2)+"A"*-(-aircraft.aisle_columns//2)
+    right = "A"*(aircraft.aisle_columns//2)+"W"*(aircraft.window_columns//2)
+    return left+right
+
+def seat_map(aircraft=ATR72_600,rows=None,layout=None,first_row_xcg=None,seat_pitch=None):
+    """
+    Returns structured array (xcg [m], column type, row) of all seats, row by row from the front.
+    Parameters default to the cabin of aircraft:
+    rows: number of seat rows
+    layout: seats of a row as a string of W (window), M (middle), A (aisle), e.g. 'WMAAMW'
+    """
+    rows = aircraft.column_pax if rows is None else rows
+    layout = aircraft_layout(aircraft) if layout is None else layout
+    first_row_xcg = aircraft.first_row_xcg if first_row_xcg is None else first_row_xcg
+    seat_pitch = aircraft.seat_pitch if seat_pitch is None else seat_pitch
+
+    seats = np.empty(rows*len(layout),dtype=seat_dtype)
+    seats["row"] = np.repeat(np.arange(rows),len(layout))
+    seats["xcg"] = np.linspace(first_row_xcg,(rows-1)*seat_pitch+first_row_xcg,rows)[seats["row"]] #as Aircraft.pax_cgs
+    seats["column"] = np.tile([column_types[seat] for seat in layout],rows)
+    return seats
+
+def tie_break(seats,rng):
+    "Returns random keys (or zeros without rng) to order seats within equal sort keys."
+    return np.zeros(seats.size) if rng is None else rng.random(seats.size)
+
+def front_to_back(seats,rng=None):
+    return np.lexsort((tie_break(seats,rng),seats["row"]))
+
+def back_to_front(seats,rng=None):
+    return np.lexsort((tie_break(seats,rng),-seats["row"]))
+
+def random_order(seats,rng=None):
+    return (rng or np.random.default_rng()).permutation(seats.size)
+
+def window_middle_aisle(seats,rng=None):
+    "Window seats first, then middle, then aisle, back to front within each column type."
+    return np.lexsort((tie_break(seats,rng),-seats["row"],seats["column"]))
+
+def by_zone(seats,rng=None,zones=3):
+    "Cabin split into zones of rows, boarded back zone first, random within a zone."
+    zone = seats["row"]*zones//(seats["row"].max()+1)
+    return np.lexsort(((rng or np.random.default_rng()).random(seats.size),-zone))
+
+def interleaved(seats,rng=None):
+    "Window-middle-aisle, every other row back to front first, then the rows in between (Steffen)."
+    return np.lexsort((tie_break(seats,rng),-seats["row"],(seats["row"]-seats["row"].max())%2,seats["column"]))
+
+boarding_policies = {
+    "front_to_back": front_to_back,
+    "back_to_front": back_to_front,
+    "random": random_order,
+    "window_middle_aisle": window_middle_aisle,
+    "by_zone": by_zone,
+    "interleaved": interleaved,
+}
+
+def cg_trajectory(seats,orders,base,pax_weight=80.):
+    """
+    Returns cg [m] and weight [kg] while boarding in orders, first entry is the empty cabin.
+    Parameters:
+    orders: seat indices in boarding order, shape (..., seats), e.g. stacked orders of several policies or trials
+    base: 2x1 moment/weight before boarding
+    """
+    orders = np.asarray(orders)
+    xcg = seats["xcg"][orders]
+    steps = np.arange(orders.shape[-1]+1)
+    moment = np.zeros(orders.shape[:-1]+(orders.shape[-1]+1,))
+    np.cumsum(pax_weight*xcg,axis=-1,out=moment[...,1:])
+    weight = base[1,0]+pax_weight*steps
+    return (base[0,0]+moment)/weight, np.broadcast_to(weight,moment.shape)
+
+def evaluate_policies(aircraft=ATR72_600,policies=None,trials=1,seed=None,seats=None,base=None):
+    """
+    Returns dict of policy name to (cg_min, cg_max) [%LEMAC] while boarding, over trials orders per policy.
+    Parameters:
+    policies: list of names in boarding_policies, all if None
+    seats: seat map, seat_map(aircraft) if None
+    base: 2x1 moment/weight before boarding, structure of aircraft if None
+    """
+    diagram = LoadingDiagram(aircraft)
+    seats = seat_map(aircraft) if seats is None else seats
+    base = diagram.Structure if base is None else base
+    rng = np.random.default_rng(seed)
+
+    names = list(boarding_policies) if policies is None else policies
+    orders = np.stack([boarding_policies[name](seats,rng) for name in names for _ in range(trials)])
+    cg, _ = cg_trajectory(seats,orders,base,aircraft.avg_pax_weight)
+    cg = diagram.to_LEMAC(cg,isArray=False).reshape(len(names),-1)
+    return {name: (cg_min, cg_max) for name, cg_min, cg_max in zip(names,cg.min(axis=1),cg.max(axis=1))}
+
+if __name__=="__main__":
+    from dataclasses import replace
+
+    for layout in ("WAAW","WMAAW","WMAAMW"):
+        aircraft = replace(ATR72_600,column_pax=72//len(layout))
+        seats = seat_map(aircraft,layout=layout)
+        print(f'{layout}, {seats.size} seats')
+        for name, (cg_min, cg_max) in evaluate_policies(aircraft,trials=100,seed=1,seats=seats).items():
+            print(f'  {name:<20}Minimum cg: {cg_min}\tMaximum cg: {cg_max}')
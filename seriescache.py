@@ -0,0 +1,87 @@
+import os
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+#Cache for assembled loading series, used by weightbalance.cached_assemble.
+#The key is a hash of the base, the Group keys in loading order and the weight offset, so equal inputs hit the cache
+#no matter which script or Aircraft object built them. A Group key holds the name, resolution and Aircraft fields
+#build_group made it from, so a lookup does not grow with the number of points. Groups without a key are hashed on their data.
+#Group data is read-only and reassigning it drops the key, so a key always describes the data it stands for.
+#Set LOADDIAGRAM_CACHE_DIR to also keep results as .npz files between runs.
+
+
+key_version = 1 #part of every key, bump when a group builder or assemble changes so old .npz files are not read
+
+def series_key(groups,base,weight_offset):
+    """
+    Returns hex digest identifying the assembled series of groups (in this order) on base.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f'series v{key_version}'.encode())
+    base = np.ascontiguousarray(base,dtype=float)
+    h.update(str(base.shape).encode())
+    h.update(base.tobytes())
+    for group in groups:
+        if group.key is not None:
+            h.update(repr(group.key).encode())
+        else:
+            arr = np.ascontiguousarray(group.data,dtype=float)
+            h.update(str(arr.shape).encode())
+            h.update(arr.tobytes())
+    h.update(np.float64(weight_offset).tobytes())
+    return h.hexdigest()
+
+class SeriesCache:
+    """
+    LRU cache of assembled series (list of 2xN arrays) with an optional .npz tier in cache_dir.
+    """
+    __slots__ = ("maxsize","cache_dir","_memory","hits","misses")
+
+    def __init__(self,maxsize=256,cache_dir=None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir,exist_ok=True)
+
+    def _path(self,key):
+        return os.path.join(self.cache_dir,f'{key}.npz')
+
+    def get(self,key):
+        "Returns cached series or None."
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as file:
+                series = [file[f'arr_{i}'] for i in range(len(file.files))]
+            self._store(key,series)
+            self.hits += 1
+            return self._memory[key]
+        self.misses += 1
+        return None
+
+    def put(self,key,series):
+        self._store(key,series)
+        if self.cache_dir is not None:
+            tmp = self._path(key)+'.tmp.npz'
+            np.savez(tmp,*series)
+            os.replace(tmp,self._path(key))
+
+    def _store(self,key,series):
+        for arr in series:
+            arr.flags.writeable = False #shared between callers
+        self._memory[key] = series
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        "Empties the memory tier, files in cache_dir are kept."
+        self._memory.clear()
+
+default_cache = SeriesCache(cache_dir=os.environ.get("LOADDIAGRAM_CACHE_DIR"))
@@ -0,0 +1,68 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from functools import partial
+from weightbalance import ATR72_HE, LoadingDiagram
+from scissor import required_ShS
+from profiling import pool_map
+
+#Design space sweep over Aircraft variants, run with e.g.
+#sweep(fs_group_xcg=np.linspace(12.5,13.5,20),column_pax=[12,14,16])
+
+
+def variant_grid(**values):
+    """
+    Returns structured array with one row per combination of values.
+    Parameters:
+    values**: Aircraft field name = 1D sequence of values
+    """
+    columns = [np.asarray(v) for v in values.values()]
+    grid = np.meshgrid(*columns,indexing='ij')
+    params = np.empty(grid[0].size,dtype=[(name,column.dtype) for name, column in zip(values,columns)])
+    for name, column in zip(values,grid):
+        params[name] = column.ravel()
+    return params
+
+def evaluate_chunk(params,base=ATR72_HE,n=1,orders=("0","5")):
+    """
+    Returns cg range in %LEMAC and required Sh/S for every variant (row) of params.
+    Parameters:
+    params: structured array from variant_grid
+    base: Aircraft the variants are derived from
+    n: aircraft index of the scissor aerodynamic inputs
+    orders: loading orders used for the cg range
+    """
+    cg_min = np.empty(params.size)
+    cg_max = np.empty(params.size)
+    for i, row in enumerate(params):
+        aircraft = replace(base,**{name: row[name].item() for name in params.dtype.names})
+        cg_min[i], cg_max[i] = LoadingDiagram(aircraft).exact_extreme_cgs(orders)
+
+    out = np.empty(params.size,dtype=params.dtype.descr+[('cg_min',float),('cg_max',float),('ShS',float)])
+    for name in params.dtype.names:
+        out[name] = params[name]
+    out['cg_min'] = cg_min
+    out['cg_max'] = cg_max
+    out['ShS'] = required_ShS(cg_min,cg_max,n)
+    return out
+
+def sweep(base=ATR72_HE,n=1,orders=("0","5"),chunksize=256,max_workers=None,**values):
+    """
+    Returns structured array with the varied inputs, cg_min, cg_max (%LEMAC) and required Sh/S per variant.
+    Variants are sent to a process pool in chunks of chunksize, max_workers=1 runs in this process.
+    Parameters:
+    values**: Aircraft field name = 1D sequence of values, every combination is evaluated
+    """
+    params = variant_grid(**values)
+    evaluate = partial(evaluate_chunk,base=base,n=n,orders=orders)
+    chunks = [params[i:i+chunksize] for i in range(0,params.size,chunksize)]
+
+    if max_workers == 1:
+        return np.concatenate([evaluate(chunk) for chunk in chunks])
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return np.concatenate(list(pool_map(executor,evaluate,chunks)))
+
+if __name__=="__main__":
+    results = sweep(fs_group_xcg=np.linspace(12.5,13.5,21),wing_group_xcg=np.linspace(11.0,11.8,9),column_pax=[12,14,16])
+    best = results[np.argmin(results['ShS'])]
+    print(f'{results.size} variants, minimum Sh/S: {best["ShS"]} at {dict(zip(results.dtype.names,best.tolist()))}')
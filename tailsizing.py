@@ -0,0 +1,81 @@
+import numpy as np
+from dataclasses import dataclass, replace
+from weightbalance import ATR72_HE, LoadingDiagram
+import scissor as sp
+
+#Tail area optimisation coupling the loading diagram and the scissor plot: the wing (and with it LEMAC and
+#the wing group) is shifted along the fuselage to minimise the Sh/S required for the cg range of the loading orders.
+#Every evaluation recomputes the cg range in %MAC with the exact envelope, the shift is found by golden section search.
+
+
+@dataclass(slots=True)
+class WingPosition:
+    """
+    dx: wing shift [m], positive aft
+    aircraft: shifted Aircraft
+    cg_min, cg_max: cg range [fraction of MAC]
+    ShS: required Sh/S
+    evaluations: number of cg range evaluations
+    """
+    dx: float
+    aircraft: object
+    cg_min: float
+    cg_max: float
+    ShS: float
+    evaluations: int
+
+def shifted(aircraft,dx):
+    "Returns aircraft with the wing, its group cg and LEMAC moved dx m aft."
+    return replace(aircraft,xcg_wing=aircraft.xcg_wing+dx,wing_group_xcg=aircraft.wing_group_xcg+dx)
+
+def required_tail(aircraft,dx,n=1,orders=("0","5"),margin=0.02):
+    """
+    Returns cg_min, cg_max [fraction of MAC] and required Sh/S of aircraft with the wing shifted dx m aft.
+    The tail arm l_h shortens by dx, the aerodynamic inputs in fractions of MAC move with the wing.
+    """
+    cg_min, cg_max = LoadingDiagram(shifted(aircraft,dx)).exact_extreme_cgs(orders)
+    ShS = sp.min_ShS(cg_min-margin, cg_max+margin, sp.x_ac_c[n], sp.x_ac_s[n], sp.l_h-dx, sp.mac, sp.VhV, sp.SM,
+                     sp.Cla_h[n], sp.Cla_Ah_stat[n], sp.deda[n], sp.CL_h[n], sp.Cm_ac[n], sp.Cl_ah_cont[n])
+    return cg_min, cg_max, float(ShS)
+
+def golden_section(f,a,b,tol=1e-4):
+    """
+    Returns x in [a, b] minimising the unimodal function f to within tol, f(x) and the number of evaluations.
+    """
+    invphi = (np.sqrt(5)-1)/2
+    c, d = b-invphi*(b-a), a+invphi*(b-a)
+    fc, fd = f(c), f(d)
+    evaluations = 2
+    while b-a > tol:
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b-invphi*(b-a)
+            fc = f(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a+invphi*(b-a)
+            fd = f(d)
+        evaluations += 1
+    return (c, fc, evaluations) if fc < fd else (d, fd, evaluations)
+
+def optimize_wing_position(aircraft=ATR72_HE,n=1,bounds=(-1.,1.),orders=("0","5"),margin=0.02,tol=1e-4):
+    """
+    Returns WingPosition with the wing shift within bounds [m] that minimises the required Sh/S.
+    Parameters:
+    n: aircraft index of the scissor aerodynamic inputs
+    orders: loading orders of the cg range
+    """
+    dx, _, evaluations = golden_section(lambda dx: required_tail(aircraft,dx,n,orders,margin)[2],*bounds,tol=tol)
+    return WingPosition(dx,shifted(aircraft,dx),*required_tail(aircraft,dx,n,orders,margin),evaluations+1)
+
+if __name__=="__main__":
+    from time import perf_counter
+
+    start = perf_counter()
+    result = optimize_wing_position()
+    elapsed = perf_counter()-start
+    _, _, ShS = required_tail(ATR72_HE,0.)
+    print(f'Current wing position: Sh/S: {ShS}')
+    print(f'Wing shift {result.dx:+.4f} m (xcg_wing {result.aircraft.xcg_wing:.4f} m): Minimum cg: {result.cg_min}\t'
+          f'Maximum cg: {result.cg_max}\tSh/S: {result.ShS}')
+    print(f'{result.evaluations} evaluations in {elapsed:.3f} s')
@@ -0,0 +1,502 @@
+import re
+import numpy as np
+from copy import copy
+from dataclasses import dataclass
+from functools import partial
+from profiling import stage
+from loadingengine import column_loading, exact_extreme_cgs, ordering_envelope, stream_extreme_cgs
+from seriescache import default_cache, series_key
+
+#Loading diagram engine shared by all aircraft variants.
+#All calculations in [xcg]=m from nose, an Aircraft holds every input that differs between variants.
+
+
+def conversion_in_m(inch):
+    "Converts inches to meters."
+    return 0.0254*inch
+
+def stack_series(series):
+    """
+    Returns series (list of 2xN np.ndarrays) concatenated into one contiguous array and the start of every series in it,
+    offsets has len(series)+1 entries, series i is stacked[:,offsets[i]:offsets[i+1]].
+    """
+    offsets = np.zeros(len(series)+1,dtype=np.intp)
+    np.cumsum([arr.shape[1] for arr in series],out=offsets[1:])
+    return np.concatenate(series,axis=1), offsets
+
+def split_series(stacked,offsets):
+    "Returns views of stacked per series, inverse of stack_series."
+    return [stacked[:,start:end] for start, end in zip(offsets[:-1],offsets[1:])]
+
+def convert_LEMAC_percent(stacked,MAC,LEMAC,out=None):
+    """
+    Converts the first row of stacked from meters ac ref. sys. to fraction of MAC in LEMAC ref. sys., stacked is not modified.
+    Parameters:
+    stacked: np.ndarray with lengths in the first row, e.g. from stack_series, further axes broadcast against MAC and LEMAC
+    out: buffer of the shape of stacked for the result (may be stacked itself), allocated if None
+    Returns:
+    out
+    """
+    if out is None:
+        out = np.empty_like(stacked)
+    np.subtract(stacked[0],LEMAC,out=out[0])
+    np.divide(out[0],MAC,out=out[0])
+    if out is not stacked:
+        out[1:] = stacked[1:]
+    return out
+
+@stage()
+def conversion_m_LEMAC_percent(data,MAC,LEMAC,isArray = True):
+    """
+    Converts data measured in meters ac ref. sys. to fraction of MAC in LEMAC ref. sys.
+    Parameters:
+    data*: list of np.ndarrays with lengths in first row, not modified
+    Returns:
+    new list with first row converted to %LEMAC, views of one contiguous array
+    """
+    if not isArray:
+        return (data-LEMAC)/MAC
+    stacked, offsets = stack_series(data)
+    return split_series(convert_LEMAC_percent(stacked,MAC,LEMAC,out=stacked),offsets)
+
+@dataclass(slots=True)
+class Aircraft:
+    """
+    Weight and balance inputs of one aircraft variant.
+    """
+    name: str
+    #weight limits
+    OEW: float #kg
+    MPW: float #kg
+    #static group weights and cgs
+    fs_group_weight: float #kg
+    fs_group_xcg: float #m
+    wing_group_weight: float #kg
+    wing_group_xcg: float #m
+    column_pax: int # pax per column
+    MTOW: float = 23000 #kg
+    MFW: float = 5000 #kg
+    #LEMAC position in ac ref. sys.
+    xcg_wing: float = 12.11714 #m
+    xcg_mac: float = 0.87514 #m, distance from LEMAC
+    xcg_lemac: float = 0.38 #-, distance as % of MAC
+    #PAX weight and balance
+    avg_pax_weight: float = 80 #kg including luggage
+    window_columns: int = 2
+    aisle_columns: int = 2
+    first_row_xcg: float = 8.494-2.362 # m, from Weight and Balance Manual page DSC 4. p.6
+    seat_pitch: float = conversion_in_m(29) #m
+    #fuel cg
+    fuel_xcg: float = 14.43-2.362 #m ,from DSC 2. p.4
+    #cargo cg, mass, from https://pdfcoffee.com/weight-n-balance-atr-42-72-3-pdf-free.html, p.10(31)
+    cargo_fw_xcg: float = 6.697-2.362 #m, same for left and right compartment
+    cargo_aft_xcg: float = 23.896-2.362 #m
+    cargo_fw_capacity: float = 928 #kg
+    cargo_aft_capacity: float = 768 #kg
+
+    @property
+    def LEMAC(self):
+        "LEMAC position in ac ref. sys. [m]"
+        return self.xcg_wing-self.xcg_mac
+
+    @property
+    def MAC(self):
+        "[m]"
+        return self.xcg_mac/self.xcg_lemac
+
+    @property
+    def num_pax(self):
+        return self.column_pax*(self.window_columns+self.aisle_columns)
+
+    @property
+    def pax_cgs(self):
+        "Seat row cg locations [m], front to back"
+        last_row_xcg = (self.column_pax-1)*self.seat_pitch+self.first_row_xcg
+        return np.linspace(self.first_row_xcg,last_row_xcg,self.column_pax)
+
+    @property
+    def Wmin(self):
+        "Weight of the static groups [kg]"
+        return self.fs_group_weight+self.wing_group_weight
+
+    @property
+    def fuel_weight_max(self):
+        return min(self.MFW,self.MTOW-self.OEW-self.cargo_aft_capacity-self.cargo_fw_capacity-self.num_pax*self.avg_pax_weight)
+
+ATR72_600 = Aircraft(
+    name = "ATR 72-600",
+    OEW = 13450, #kg -c-
+    MPW = 7550, #kg -c-
+    fs_group_weight = 6696, #kg
+    fs_group_xcg = 12.11401353, #m
+    wing_group_weight = 6601, #kg
+    wing_group_xcg = 11.47228523, #m
+    column_pax = 18,
+)
+
+ATR72_HE = Aircraft(
+    name = "ATR 72-HE",
+    OEW = 14268.58, #kg
+    MPW = 6270, #kg
+    fs_group_weight = 8327.65, #kg
+    fs_group_xcg = 12.96525666, #m
+    wing_group_weight = 5940.92553, #kg
+    wing_group_xcg = 11.40063778, #m
+    column_pax = 14,
+)
+
+class Group:
+    """
+    Loading group, data 2xN running moments/weights. A linear group adds its load at one xcg,
+    its points only sample a continuous line (see loadingengine.exact_extreme_cgs).
+    key: the builder inputs the data follows from (set by build_group), None to key the series cache on the data.
+    data is read-only, so a keyed group cannot change under the series cache; assigning new data drops the key.
+    """
+
+    def __init__(self,data,name,color=None,linear=False,key=None):
+        self.data = data
+        self.name = name
+        self.color = color
+        self.linear = linear
+        self.key = key
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self,data):
+        data = np.asarray(data).view()
+        data.flags.writeable = False
+        self._data = data
+        self.key = None
+
+class LoadingSeries:
+    """
+    Loading series of consecutive groups in one contiguous structured array of (cg, weight, group_id) points.
+    Group i is points[offsets[i]:offsets[i+1]]. Indexing returns zero-copy (cg, weight) views of a group,
+    so a LoadingSeries can be used wherever a list of 2xN arrays is expected.
+    """
+    __slots__ = ("points","offsets","names","colors")
+    dtype = np.dtype([("cg",float),("weight",float),("group_id",np.intp)])
+
+    def __init__(self,points,offsets,names,colors):
+        self.points = points
+        self.offsets = offsets
+        self.names = tuple(names)
+        self.colors = tuple(colors)
+
+    @classmethod
+    def from_series(cls,series,names=None,colors=None):
+        """
+        Returns LoadingSeries of series (list of 2xN arrays, cgs in the first row), e.g. as returned by assemble.
+        """
+        stacked, offsets = stack_series(series)
+        points = np.empty(stacked.shape[1],dtype=cls.dtype)
+        points["cg"] = stacked[0]
+        points["weight"] = stacked[1]
+        points["group_id"] = np.repeat(np.arange(len(series)),np.diff(offsets))
+        if names is None:
+            names = (None,)*len(series)
+        if colors is None:
+            colors = (None,)*len(series)
+        return cls(points,offsets,names,colors)
+
+    def __len__(self):
+        return len(self.offsets)-1
+
+    def __getitem__(self,i):
+        group = self.group(i)
+        return group["cg"], group["weight"]
+
+    def group(self,i):
+        "Returns structured view of the points of group i."
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.points[self.offsets[i]:self.offsets[i+1]]
+
+    @property
+    def cg(self):
+        return self.points["cg"]
+
+    @property
+    def weight(self):
+        return self.points["weight"]
+
+    @property
+    def group_id(self):
+        return self.points["group_id"]
+
+    def extreme_cgs(self):
+        "Returns minimum and maximum cg of all points."
+        return self.cg.min(), self.cg.max()
+
+    def group_extremes(self):
+        "Returns minimum and maximum cg per group, nan for empty groups."
+        cg_min = np.full(len(self),np.nan)
+        cg_max = np.full(len(self),np.nan)
+        nonempty = np.flatnonzero(np.diff(self.offsets))
+        cg_min[nonempty] = np.minimum.reduceat(self.cg,self.offsets[nonempty])
+        cg_max[nonempty] = np.maximum.reduceat(self.cg,self.offsets[nonempty])
+        return cg_min, cg_max
+
+    def filter(self,mask):
+        """
+        Returns new LoadingSeries with the points where mask (bool array over all points) is True, groups are kept (possibly empty).
+        """
+        points = self.points[mask]
+        offsets = np.zeros(len(self)+1,dtype=np.intp)
+        np.cumsum(np.bincount(points["group_id"],minlength=len(self)),out=offsets[1:])
+        return LoadingSeries(points,offsets,self.names,self.colors)
+
+    def to_LEMAC(self,MAC,LEMAC,inplace=False):
+        "Returns LoadingSeries with cgs converted from m to fraction of MAC in LEMAC ref. sys., a copy unless inplace."
+        series = self if inplace else LoadingSeries(self.points.copy(),self.offsets,self.names,self.colors)
+        np.subtract(series.cg,LEMAC,out=series.cg)
+        np.divide(series.cg,MAC,out=series.cg)
+        return series
+
+@stage()
+def assemble(*groups:Group,base:None|np.ndarray=None,weight_offset=0.):
+    """
+    Returns cg location(s) for loading groups specified by groups.
+    Parameters:
+    groups*: size 2xN, first row containing moments, second row containing weights
+    weight_offset: added to the plotted weights, e.g. OEW-Wmin to start the diagram at OEW
+    Returns: list of np.ndarrays with weight as the first row and cgs as second.
+    """
+    series = []
+    names = []
+    colors = []
+    if base is None:
+        base = np.zeros((2,1))
+
+    for group in groups:
+        running = group.data + base
+        base = running[:,-1].reshape(2,1)
+        cgs = running[0]/running[1]
+        weigths = running[1]+weight_offset
+        series.append(np.vstack([cgs,weigths]))
+        names.append(group.name)
+        colors.append(group.color)
+
+    return series, names, colors
+
+@stage()
+def cached_assemble(*groups:Group,base:None|np.ndarray=None,weight_offset=0.,cache=None):
+    """
+    assemble with the series cached on base and the keys of groups (seriescache.default_cache if cache is None).
+    Returns: list of read-only np.ndarrays, names and colors, as assemble.
+    """
+    if cache is None:
+        cache = default_cache
+    if base is None:
+        base = np.zeros((2,1))
+
+    key = series_key(groups,base,weight_offset)
+    series = cache.get(key)
+    if series is None:
+        series, _, _ = assemble(*groups,base=base,weight_offset=weight_offset)
+        cache.put(key,series)
+    return list(series), [group.name for group in groups], [group.color for group in groups]
+
+@stage()
+def extract_extreme_cgs(*series):
+    """
+    Returns minimum and maximum cg. locations of a data series.
+    Use loadingengine.stream_extreme_cgs directly to pass a generator or to get where the extremes are.
+    """
+    if all(isinstance(arr,LoadingSeries) for arr in series):
+        extremes = [arr.extreme_cgs() for arr in series]
+        return min(extreme[0] for extreme in extremes), max(extreme[1] for extreme in extremes)
+    (cg_min, _), (cg_max, _) = stream_extreme_cgs(series)
+    return cg_min, cg_max
+
+def structure(ac):
+    "Returns the static structure of Aircraft ac, 2x1 moment/weight, acts as base of every loading order."
+    Fuselage = np.vstack([ac.fs_group_weight*ac.fs_group_xcg,ac.fs_group_weight])
+    Wing = np.vstack([ac.wing_group_weight*ac.wing_group_xcg,ac.wing_group_weight])
+    return Fuselage + Wing
+
+def cargo_group(ac,compartment,resolution=50):
+    "Returns linear Group loading the fw or aft cargo compartment of Aircraft ac, sampled at resolution points."
+    weights = np.linspace(0,getattr(ac,f'cargo_{compartment}_capacity'),resolution)
+    if compartment == "fw":
+        return Group(np.vstack([weights*ac.cargo_fw_xcg,weights]),"Load forward compartment",'maroon',linear=True)
+    return Group(np.vstack([weights*ac.cargo_aft_xcg,weights]),"Load aft compartment",'mediumslateblue',linear=True)
+
+def pax_group(ac,seats,aft_to_fw=False):
+    "Returns Group boarding the window or aisle seats of Aircraft ac, front to back or back to front."
+    #pax loading, for one column (running sums, first entry is the empty column)
+    moments, weights = column_loading(ac.pax_cgs,ac.avg_pax_weight,aft_to_fw=aft_to_fw)
+    name = f'{seats.capitalize()} seats, {"back to front" if aft_to_fw else "front to back"}'
+    return Group(getattr(ac,f'{seats}_columns')*np.vstack([moments,weights]),name)
+
+def fuel_group(ac,resolution=50):
+    "Returns linear Group fuelling Aircraft ac up to its maximum fuel weight, sampled at resolution points."
+    weights = np.linspace(0,ac.fuel_weight_max,resolution)
+    return Group(np.vstack([weights*ac.fuel_xcg,weights]),"Fuel","lime",linear=True)
+
+#Aircraft fields read by each stage, used by pipeline to recompute only what a changed field affects
+structure_fields = ("fs_group_weight","fs_group_xcg","wing_group_weight","wing_group_xcg")
+pax_fields = ("column_pax","first_row_xcg","seat_pitch","avg_pax_weight")
+fuel_weight_fields = ("MFW","MTOW","OEW","cargo_fw_capacity","cargo_aft_capacity","column_pax","window_columns","aisle_columns","avg_pax_weight")
+lemac_fields = ("xcg_wing","xcg_mac","xcg_lemac")
+
+#group name: (builder, Aircraft fields it reads)
+group_builders = {
+    "CargoF1": (partial(cargo_group,compartment="fw"),("cargo_fw_capacity","cargo_fw_xcg")),
+    "CargoA1": (partial(cargo_group,compartment="aft"),("cargo_aft_capacity","cargo_aft_xcg")),
+    "Pax_window_fw_to_aft": (partial(pax_group,seats="window"),pax_fields+("window_columns",)),
+    "Pax_aisle_fw_to_aft": (partial(pax_group,seats="aisle"),pax_fields+("aisle_columns",)),
+    "Pax_window_aft_to_fw": (partial(pax_group,seats="window",aft_to_fw=True),pax_fields+("window_columns",)),
+    "Pax_aisle_aft_to_fw": (partial(pax_group,seats="aisle",aft_to_fw=True),pax_fields+("aisle_columns",)),
+    "Fuel1": (fuel_group,fuel_weight_fields+("fuel_xcg",)),
+}
+linear_groups = {"CargoF1","CargoA1","Fuel1"} #builders taking a plotting resolution
+
+def build_group(ac,name,resolution=50):
+    "Returns Group name of Aircraft ac, the second variant (e.g. CargoF2) has no legend entry."
+    if name == "NullGroup":
+        return Group(np.zeros((2,1)),None,key=(name,))
+    if name not in group_builders:
+        group = build_group(ac,name[:-1]+"1",resolution)
+        group.name = None
+        return group
+    builder, fields = group_builders[name]
+    group = builder(ac,resolution=resolution) if name in linear_groups else builder(ac)
+    group.key = (name,resolution if name in linear_groups else None,tuple(getattr(ac,field) for field in fields))
+    return group
+
+@stage()
+def build_groups(ac,resolution=50):
+    """
+    Returns the static structure (2x1 moment/weight base) and a dict of loading Groups of Aircraft ac.
+    resolution: number of points of the linear (cargo and fuel) groups, only affects the plotted lines
+    """
+    groups = {name: build_group(ac,name,resolution) for name in group_builders}
+
+    #second variant of each group is plotted without a legend entry
+    for name in ("CargoF","CargoA","Fuel"):
+        groups[name+"2"] = copy(groups[name+"1"])
+        groups[name+"2"].name = None
+
+    groups["NullGroup"] = build_group(ac,"NullGroup")
+    return structure(ac), groups
+
+#loading orders with a front to back (1) and back to front (2) variant, by group name
+loading_orders = {
+    "0": (("CargoF1","CargoA1","Pax_window_fw_to_aft","Pax_aisle_fw_to_aft","Fuel1"), #cargo, pax, fuel
+          ("CargoA2","CargoF2","Pax_window_aft_to_fw","Pax_aisle_aft_to_fw","Fuel2")),
+    "1": (("Fuel1","CargoF1","CargoA1","Pax_window_fw_to_aft","Pax_aisle_fw_to_aft"), #fuel,cargo,pax
+          ("Fuel2","CargoA2","CargoF2","Pax_window_aft_to_fw","Pax_aisle_aft_to_fw")),
+    "2": (("Pax_window_fw_to_aft","Pax_aisle_fw_to_aft","Fuel1","CargoF1","CargoA1"), #pax,fuel,cargo
+          ("Pax_window_aft_to_fw","Pax_aisle_aft_to_fw","Fuel2","CargoA2","CargoF2")),
+    "3": (("Fuel1","Pax_window_fw_to_aft","Pax_aisle_fw_to_aft","CargoA1","CargoF1"), #fuel,pax,cargo
+          ("Fuel2","Pax_window_aft_to_fw","Pax_aisle_aft_to_fw","CargoF2","CargoA2")),
+    "4": (("CargoF1","CargoA1","Fuel1","Pax_window_fw_to_aft","Pax_aisle_fw_to_aft"), #cargo, fuel, pax
+          ("CargoA2","CargoF2","Fuel2","Pax_window_aft_to_fw","Pax_aisle_aft_to_fw")),
+    "5": (("Pax_window_fw_to_aft","Pax_aisle_fw_to_aft","CargoF1","CargoA1","Fuel1"), #pax,cargo,fuel
+          ("Pax_window_aft_to_fw","Pax_aisle_aft_to_fw","CargoA2","CargoF2","Fuel2")),
+}
+
+class LoadingDiagram:
+    """
+    Loading groups and series of one Aircraft. Series are assembled on first access and cached,
+    so evaluating a variant costs its array passes only.
+    """
+    __slots__ = ("aircraft","Structure","groups","_series_raw","_series")
+
+    def __init__(self,aircraft,resolution=50):
+        self.aircraft = aircraft
+        self.Structure, self.groups = build_groups(aircraft,resolution)
+        self._series_raw = {}
+        self._series = {}
+
+    @property
+    def Wmin(self):
+        return float(self.Structure[1,0])
+
+    def to_LEMAC(self,data,isArray=True):
+        "conversion_m_LEMAC_percent with the MAC and LEMAC of this aircraft."
+        return conversion_m_LEMAC_percent(data,self.aircraft.MAC,self.aircraft.LEMAC,isArray)
+
+    def assemble(self,*groups):
+        "assemble starting from the structure, with weights starting at OEW."
+        return cached_assemble(*groups,base=self.Structure,weight_offset=self.aircraft.OEW-self.Wmin)
+
+    def get_series_raw(self,key):
+        """
+        Returns series (in m), names and colors of loading order key, e.g. '01'. Computed on first access.
+        """
+        if key not in self._series_raw:
+            names = loading_orders[key[0]][int(key[1])-1]
+            self._series_raw[key] = self.assemble(*(self.groups[name] for name in names))
+        return self._series_raw[key]
+
+    def get_series(self,key):
+        """
+        Returns LoadingSeries of loading order key, e.g. '01', in %LEMAC. Computed on first access.
+        """
+        if key not in self._series:
+            series = LoadingSeries.from_series(*self.get_series_raw(key))
+            self._series[key] = series.to_LEMAC(self.aircraft.MAC,self.aircraft.LEMAC,inplace=True)
+        return self._series[key]
+
+    def get_pair(self,order):
+        """
+        Returns series1, series2, names1, names2, colors1, colors2 of loading order order, e.g. '0', as used by plot_loaddiagram.
+        """
+        _, names1, colors1 = self.get_series_raw(order+"1")
+        _, names2, colors2 = self.get_series_raw(order+"2")
+        return self.get_series(order+"1"), self.get_series(order+"2"), names1, names2, colors1, colors2
+
+    def extreme_cgs(self,orders=("0","5")):
+        """
+        Returns minimum and maximum cg in %LEMAC over both variants of the given loading orders.
+        """
+        return extract_extreme_cgs(*(self.get_series(order+variant) for order in orders for variant in "12"))
+
+    def exact_extreme_cgs(self,orders=("0","5")):
+        """
+        Returns exact minimum and maximum cg in %LEMAC over both variants of the given loading orders,
+        without assembling the series: O(groups) for the linear groups, independent of the resolution.
+        """
+        cg_min, cg_max = np.inf, -np.inf
+        for order in orders:
+            for names in loading_orders[order]:
+                groups = [self.groups[name] for name in names]
+                order_min, order_max = exact_extreme_cgs([group.data for group in groups],self.Structure,
+                                                         [group.linear for group in groups])
+                cg_min, cg_max = min(cg_min,order_min), max(cg_max,order_max)
+        return self.to_LEMAC(cg_min,isArray=False), self.to_LEMAC(cg_max,isArray=False)
+
+    def ordering_extremes(self,groups,labels,orderings=None):
+        """
+        Returns minimum and maximum cg in %LEMAC over every loading order of groups (or the given orderings).
+        Parameters:
+        groups: list of Group
+        labels: list of str, one per group, used to describe the orderings
+        Returns:
+        (cg_min, ordering_min), (cg_max, ordering_max) with orderings as lists of labels
+        """
+        (cg_min, order_min), (cg_max, order_max) = ordering_envelope(groups,self.Structure,orderings)
+        return ((self.to_LEMAC(cg_min,isArray=False),[labels[i] for i in order_min]),
+                (self.to_LEMAC(cg_max,isArray=False),[labels[i] for i in order_max]))
+
+    def attribute(self,name):
+        """
+        Returns group or lazily computed series attribute name: seriesXY, seriesXY_raw, namesXY or colorsXY.
+        Raises AttributeError for other names.
+        """
+        if name in self.groups:
+            return self.groups[name]
+        match = re.fullmatch(r"(series|names|colors)([0-9])([12])(_raw)?",name)
+        if match is None or match[2] not in loading_orders or (match[4] and match[1] != "series"):
+            raise AttributeError(name)
+        key = match[2]+match[3]
+        if match[1] == "series" and not match[4]:
+            return self.get_series(key)
+        return self.get_series_raw(key)[["series","names","colors"].index(match[1])]
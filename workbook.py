@@ -0,0 +1,145 @@
+import os
+import numpy as np
+from dataclasses import dataclass, fields, astuple
+from weightbalance import Aircraft
+
+#Reads the aircraft inputs from the ADSEE workbook into typed records.
+#The first read parses the workbook (openpyxl, read-only mode) and writes a .npz snapshot next to it,
+#later reads load the snapshot as long as the workbook's mtime and size are unchanged.
+
+
+workbook_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),"ADSEE aircraft assignment II.xlsx")
+
+@dataclass(slots=True)
+class StabilityInputs:
+    """
+    Scissor plot inputs of one aircraft, same names as in scissor.
+    """
+    Cla_h: float # Lift coefficient horizontal tail
+    Cla_Ah_stat: float # Lift coefficient aircraft without horizontal tail stat cond
+    deda: float # Downwash gradient
+    x_ac_s: float # Aerodynamic center
+    CL_h: float
+    Cm_ac: float # Moment coefficient aircraft
+    Cl_ah_cont: float # Lift coefficient aircraft with horizontal tail cont cond
+    x_ac_c: float # Aerodynamic center
+    l_h: float # Distance between aerodynamic center and horizontal tail
+    mac: float # Mean aerodynamic chord
+    VhV: float # Velocity ratio horizontal tail to aircraft
+
+def label_table(ws):
+    """
+    Returns dict of every text cell of worksheet ws to the values right of it (first occurrence wins).
+    """
+    table = {}
+    for row in ws.iter_rows(values_only=True):
+        for i, cell in enumerate(row):
+            if isinstance(cell,str):
+                table.setdefault(cell.strip(),row[i+1:])
+    return table
+
+def table_rows(ws,header):
+    """
+    Returns dict of first cell to the rest of the row, for the rows below the row starting with header up to the first empty row.
+    """
+    table = None
+    for row in ws.iter_rows(values_only=True):
+        if table is None:
+            if row and row[0] == header:
+                table = {}
+        elif row[0] is None:
+            break
+        else:
+            table[row[0]] = row[1:]
+    return table
+
+def parse_workbook(path=workbook_path):
+    """
+    Parses the workbook. Returns Aircraft and StabilityInputs of the ATR 72-600.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path,read_only=True,data_only=True)
+    try:
+        data = label_table(wb["Data"])
+        components = table_rows(wb["2.1bc (Weight Table & Chart)"],"Component")
+        groups = table_rows(wb["2.1bc (Weight Table & Chart)"],"Group")
+        static = label_table(wb["2.1ef Static Stability"])
+        control = label_table(wb["2.1f Controllability"])
+    finally:
+        wb.close()
+
+    #component rows: category, %MTOW, weight, xcg ac, xcg MAC, xcg %MAC. group rows: %MTOW, weight, xcg ac, ...
+    wing = components["Wing"]
+    defaults = {field.name: field.default for field in fields(Aircraft)}
+    seat_columns = defaults["window_columns"]+defaults["aisle_columns"]
+    aircraft = Aircraft(
+        name = "ATR 72-600",
+        OEW = data["OEW [kg]"][0],
+        MPW = data["MPW [kg]"][0],
+        fs_group_weight = groups["Fuselage Group"][1],
+        fs_group_xcg = groups["Fuselage Group"][2],
+        wing_group_weight = groups["Wing Group"][1],
+        wing_group_xcg = groups["Wing Group"][2],
+        column_pax = data["PAX [-]"][0]//seat_columns,
+        MTOW = data["MTOW [kg]"][0],
+        MFW = data["MFW [kg]"][0],
+        xcg_wing = wing[3],
+        xcg_mac = wing[4],
+        xcg_lemac = wing[5],
+    )
+    stability = StabilityInputs(
+        Cla_h = static["Clalpha_h"][0],
+        Cla_Ah_stat = static["Clalpha_A-h"][0],
+        deda = static["de/dalpha"][0],
+        x_ac_s = static["x_ac"][0],
+        CL_h = control["C_Lh"][0],
+        Cm_ac = control["C_m_ac"][0],
+        Cl_ah_cont = control["Clalpha_A-h"][0],
+        x_ac_c = control["x_ac"][0],
+        l_h = static["l_h"][0],
+        mac = static["c_mac"][0],
+        VhV = static["Vh/V"][0],
+    )
+    return aircraft, stability
+
+def record_dtype(cls):
+    "Returns structured dtype with one field per dataclass field of cls."
+    types = {str: 'U64', int: 'i8', float: 'f8'}
+    return np.dtype([(field.name,types[field.type]) for field in fields(cls)])
+
+def snapshot_key(path):
+    stat = os.stat(path)
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
+
+def snapshot_path(path):
+    return os.path.join(os.path.dirname(path),".cache",os.path.basename(path)+".npz")
+
+def load_workbook_inputs(path=workbook_path,snapshot=None):
+    """
+    Returns Aircraft and StabilityInputs from the workbook, from the .npz snapshot if it is up to date.
+    Parameters:
+    snapshot: snapshot file, default .cache/<workbook name>.npz next to the workbook
+    """
+    if snapshot is None:
+        snapshot = snapshot_path(path)
+    key = snapshot_key(path)
+
+    if os.path.exists(snapshot):
+        with np.load(snapshot) as file:
+            if str(file["key"]) == key:
+                return Aircraft(*file["aircraft"].item()), StabilityInputs(*file["stability"].item())
+
+    aircraft, stability = parse_workbook(path)
+    os.makedirs(os.path.dirname(snapshot),exist_ok=True)
+    tmp = snapshot+".tmp.npz"
+    np.savez(tmp,key=np.array(key),
+             aircraft=np.array(astuple(aircraft),dtype=record_dtype(Aircraft)),
+             stability=np.array(astuple(stability),dtype=record_dtype(StabilityInputs)))
+    os.replace(tmp,snapshot)
+    return aircraft, stability
+
+if __name__=="__main__":
+    aircraft, stability = load_workbook_inputs()
+    print(aircraft)
+    print(stability)